@@ -0,0 +1,46 @@
+"""Medición de los modos de captura de cada cámara (backend, resolución, FPS, FOURCC)
+
+Uso:
+    python benchmark_camera_modes.py              # cámaras 0-2, todos los backends
+    python benchmark_camera_modes.py 0            # solo la cámara 0
+    python benchmark_camera_modes.py 0 V4L2 Auto  # cámara 0 con esos backends
+
+Para cada combinación abre la cámara, pide el modo y lee una ráfaga de
+frames midiendo los FPS realmente entregados, la latencia de cada read() y
+el tiempo de CPU por frame (decodificación incluida). El perfil ordenado se
+guarda en camera_profile.json bajo la huella del equipo; los detectores lo
+usan al iniciar el monitoreo para abrir la cámara en el modo más barato que
+cumple su resolución mínima.
+"""
+import sys
+
+from detector_core import CAMERA_BACKENDS, CameraProbe, select_capture_mode
+
+BACKENDS = ("V4L2", "DirectShow", "Media Foundation", "Auto")
+
+
+def main():
+    indices = [int(sys.argv[1])] if len(sys.argv) > 1 else [0, 1, 2]
+    backends = [name for name in sys.argv[2:] if name in CAMERA_BACKENDS] or list(BACKENDS)
+
+    probe = CameraProbe(backends=backends, indices=indices)
+    profile = probe.benchmark()
+    if not profile:
+        print("ERROR: ninguna cámara entregó frames")
+        return
+
+    print(f"\nPerfil guardado en {probe.profile_file} ({len(profile)} modos), del más barato al más caro:")
+    for mode in profile[:10]:
+        print(f"  cámara {mode['index']} {mode['backend']:<16} {mode['width']}x{mode['height']} {mode['fourcc']} "
+              f"@ {mode['fps']} | {mode['delivered_fps']} fps | read {mode['read_ms']} ms | CPU {mode['cpu_ms']} ms")
+
+    best = select_capture_mode(profile, (640, 360), 20)
+    if best:
+        print(f"\nModo elegido para 640x360 @ 20 fps: {best['backend']} {best['width']}x{best['height']} "
+              f"{best['fourcc']} @ {best['fps']}")
+    else:
+        print("\nWARNING: ningún modo cumple 640x360 @ 20 fps")
+
+
+if __name__ == '__main__':
+    main()
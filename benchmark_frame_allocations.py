@@ -0,0 +1,155 @@
+"""Memoria reservada por frame en el bucle del detector optimizado, con y sin buffers preasignados
+
+Uso:
+    python benchmark_frame_allocations.py                         # escena sintética, intelligent_flexible
+    python benchmark_frame_allocations.py grabacion.mp4           # frames de un video
+    python benchmark_frame_allocations.py grabacion.mp4 shapes_only  # otro método de detección
+
+Corre el cuerpo de detection_loop sin ventana ni cámara (espejado, contexto,
+detección, vista anotada y ritmo) sobre los mismos frames, con
+'reuse_buffers' encendido y apagado. Tras un calentamiento mide con
+tracemalloc, frame por frame, el pico de memoria reservada por encima de la
+del inicio del frame (lo que se reserva y libera dentro del frame) y lo que
+queda retenido en promedio. En régimen estable, con buffers, ambos deben
+estar cerca de cero: solo quedan los objetos chicos de los resultados.
+'buffers nuevos' cuenta los buffers del pool reservados después del
+calentamiento: antes de medir, `FrameBuffers.presize` reserva en los dos
+juegos lo que las etapas de bajo ritmo usaron solo en uno, así que un
+número distinto de cero es una etapa que recién entonces corrió por
+primera vez.
+"""
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from detector_core import FramePacket
+from phone_detector_optimized import OptimizedPhoneDetector
+
+WARMUP_FRAMES = 300  # Suficientes para que corran todas las ramas (y reserven sus buffers)
+TRACED_WARMUP_FRAMES = 30
+MEASURED_FRAMES = 200
+
+
+class _Setting:
+    """Sustituto de las variables de tkinter que lee el bucle"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class HeadlessDetector(OptimizedPhoneDetector):
+    """Detector optimizado sin ventana: solo lo que corre por frame"""
+
+    def setup_gui(self):
+        self.detection_method = _Setting('intelligent_flexible')
+        self.show_camera = True
+
+    def load_stats(self):
+        pass
+
+    def detect_available_cameras(self):
+        pass
+
+    def step(self, packet):
+        """Una iteración de detection_loop sin alertas, tkinter ni espera"""
+        self.begin_frame()
+        ctx = self.build_frame_context(packet)
+        self.analyze_frame(ctx, self.detection_method.get())
+        self.render_camera_frame(ctx)
+        self.update_capture_rate(len(ctx.results.get('faces', [])), ctx.timestamp)
+
+
+def load_frames(path, limit=120):
+    """Frames de un video o una escena sintética con un celular que se mueve"""
+    if path is not None:
+        frames = []
+        cap = cv2.VideoCapture(path)
+        while len(frames) < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        return frames
+
+    from benchmark_phone_candidates import cluttered_desk
+    print("INFO: sin video, usando una escena sintética")
+    rng = np.random.default_rng(0)
+    desk = cluttered_desk(rng)
+    frames = []
+    for i in range(60):
+        frame = desk.copy()
+        x = 100 + 6 * (i if i < 30 else 60 - i)
+        cv2.rectangle(frame, (x, 200), (x + 70, 340), (15, 15, 15), -1)
+        cv2.rectangle(frame, (x, 200), (x + 70, 340), (230, 230, 230), 3)
+        frames.append(frame)
+    return frames
+
+
+def run(frames, method, reuse_buffers):
+    """(KB reservados y liberados por frame, KB retenidos por frame, ms/frame, buffers nuevos del pool)"""
+    detector = HeadlessDetector()
+    detector.detection_method = _Setting(method)
+    detector.config['reuse_buffers'] = reuse_buffers
+    detector.config['resolution_scaling'] = False
+    detector.buffers.enabled = reuse_buffers
+
+    def packet(seq):
+        # Como el anillo del FrameGrabber: el frame capturado ya está en memoria
+        return FramePacket(seq, time.time(), frames[seq % len(frames)], 0)
+
+    for seq in range(WARMUP_FRAMES):
+        detector.step(packet(seq))
+    detector.buffers.presize()
+    pool_allocations = detector.buffers.allocations
+
+    start = time.perf_counter()
+    for seq in range(WARMUP_FRAMES, WARMUP_FRAMES + MEASURED_FRAMES):
+        detector.step(packet(seq))
+    frame_ms = (time.perf_counter() - start) * 1000 / MEASURED_FRAMES
+
+    # Unos frames ya trazados antes de medir: lo que se libera y se había reservado
+    # sin trazar no descuenta, y haría parecer retenido lo que solo se reemplazó
+    tracemalloc.start()
+    for seq in range(TRACED_WARMUP_FRAMES):
+        detector.step(packet(seq))
+
+    transient = []
+    start_memory = tracemalloc.get_traced_memory()[0]
+    for seq in range(WARMUP_FRAMES, WARMUP_FRAMES + MEASURED_FRAMES):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        detector.step(packet(seq))
+        transient.append(tracemalloc.get_traced_memory()[1] - before)
+    retained = tracemalloc.get_traced_memory()[0] - start_memory
+    tracemalloc.stop()
+
+    return (np.mean(transient) / 1024, retained / 1024 / MEASURED_FRAMES, frame_ms,
+            detector.buffers.allocations - pool_allocations)
+
+
+def main():
+    frames = load_frames(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not frames:
+        print("ERROR: no se pudieron leer frames")
+        return
+    method = sys.argv[2] if len(sys.argv) > 2 else 'intelligent_flexible'
+
+    height, width = frames[0].shape[:2]
+    print(f"Frames: {len(frames)} | resolución: {width}x{height} | método: {method} | "
+          f"frame BGR: {width * height * 3 / 1024:.0f} KB")
+    print(f"{'buffers':<10} {'reservado/frame':>16} {'retenido/frame':>15} {'ms/frame':>9} {'buffers nuevos':>15}")
+    for reuse_buffers in (False, True):
+        transient_kb, retained_kb, frame_ms, pool = run(frames, method, reuse_buffers)
+        label = 'sí' if reuse_buffers else 'no'
+        print(f"{label:<10} {transient_kb:>13.1f} KB {retained_kb:>12.2f} KB {frame_ms:>9.2f} {pool:>15}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Benchmark: extracción de candidatos a celular, bucle original vs. find_phone_candidates
+
+Uso:
+    python benchmark_phone_candidates.py                # escritorios sintéticos (la mitad con textura)
+    python benchmark_phone_candidates.py carpeta/       # imágenes grabadas (.jpg/.png)
+
+Mide los dos preprocesamientos del repo (Optimizado: adaptativo + Canny;
+Avanzado: solo Canny), con los umbrales y límites de la configuración por
+defecto de cada detector. Para cada frame ambas versiones reciben los
+mismos contornos y se verifica que devuelvan las mismas cajas antes de medir.
+"""
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from detector_core import FrameContext, find_phone_candidates, shape_edges
+
+
+def detector_config(cls):
+    """Configuración por defecto de un detector, sin ventana ni búsqueda de cámaras"""
+    class Headless(cls):
+        def setup_gui(self):
+            pass
+
+        def load_stats(self):
+            pass
+
+        def detect_available_cameras(self):
+            pass
+
+    return Headless().config
+
+
+def pipelines():
+    """Por detector: (umbrales de Canny, (área mínima, área máxima, solidez mínima, proporción mínima, máxima))"""
+    from phone_detector_advanced import AdvancedPhoneDetector
+    from phone_detector_optimized import OptimizedPhoneDetector
+
+    optimized = detector_config(OptimizedPhoneDetector)
+    advanced = detector_config(AdvancedPhoneDetector)
+    return {
+        'Optimizado': ((optimized['canny_low'], optimized['canny_high']),
+                       (optimized['phone_min_area'], optimized['phone_max_area'],
+                        optimized['min_contour_solidity'], 1.2, 3.5)),
+        # Proporciones fijas en AdvancedPhoneDetector.find_phone_candidates
+        'Avanzado': ((advanced['canny_low'], advanced['canny_high']),
+                     (advanced['phone_min_area'], advanced['phone_max_area'], 0.0, 1.4, 2.8)),
+    }
+
+
+def legacy_candidates(contours, min_area, max_area, min_solidity, min_aspect, max_aspect):
+    """Bucle original: casco convexo y aproximación para cada contorno que pasa el área"""
+    candidates = []
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area < min_area or area > max_area:
+            continue
+        solidity = 1.0
+        if min_solidity > 0:
+            hull_area = cv2.contourArea(cv2.convexHull(contour))
+            if hull_area == 0:
+                continue
+            solidity = area / hull_area
+            if solidity < min_solidity:
+                continue
+        epsilon = 0.02 * cv2.arcLength(contour, True)
+        if len(cv2.approxPolyDP(contour, epsilon, True)) >= 4:
+            x, y, w, h = cv2.boundingRect(contour)
+            if min_aspect <= max(w, h) / min(w, h) <= max_aspect:
+                candidates.append({'bbox': (x, y, w, h), 'area': area, 'solidity': solidity})
+    return candidates
+
+
+def cluttered_desk(rng, width=640, height=480, textured=False):
+    """Escritorio sintético: papeles, lápices, texto y algún celular"""
+    frame = rng.integers(90, 140, (height, width, 3), dtype=np.uint8)
+    frame = cv2.GaussianBlur(frame, (5, 5), 0)
+    noise = rng.normal(0, 12, frame.shape)
+    frame = np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+    for _ in range(rng.integers(15, 30)):
+        x, y = rng.integers(0, width), rng.integers(0, height)
+        w, h = rng.integers(20, 200), rng.integers(20, 200)
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.rectangle(frame, (x, y), (x + w, y + h), color, -1 if rng.random() < 0.6 else 2)
+
+    for _ in range(rng.integers(20, 40)):
+        p1 = tuple(int(v) for v in rng.integers(0, (width, height)))
+        p2 = tuple(int(v) for v in rng.integers(0, (width, height)))
+        cv2.line(frame, p1, p2, (int(rng.integers(0, 255)),) * 3, int(rng.integers(1, 4)))
+
+    for _ in range(rng.integers(10, 25)):
+        org = tuple(int(v) for v in rng.integers(0, (width, height)))
+        cv2.putText(frame, 'lorem ipsum', org, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (20, 20, 20), 1)
+
+    for _ in range(rng.integers(1, 3)):
+        x, y = int(rng.integers(0, width - 80)), int(rng.integers(0, height - 150))
+        cv2.rectangle(frame, (x, y), (x + 70, y + 140), (15, 15, 15), -1)
+
+    if textured:
+        # Veta de madera / tela: grano fino que llena el mapa de bordes de contornos chicos
+        grain = cv2.GaussianBlur(rng.normal(0, 60, (height, width)).astype(np.float32), (0, 0), 2.0) * 4
+        frame = np.clip(frame + grain[..., None], 0, 255).astype(np.uint8)
+
+    return frame
+
+
+def contours_of(frame, pipeline, canny):
+    """Mismo preprocesamiento que find_phone_candidates del detector correspondiente"""
+    ctx = FrameContext(frame)
+    if pipeline == 'Avanzado':
+        edges = cv2.Canny(ctx.blurred(5), *canny)
+    else:
+        edges = shape_edges(ctx.bilateral, *canny)
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return contours
+
+
+def load_frames(path, count=30):
+    if path:
+        files = sorted(glob.glob(os.path.join(path, '*.jpg')) + glob.glob(os.path.join(path, '*.png')))
+        frames = [cv2.imread(f) for f in files]
+        return [f for f in frames if f is not None]
+    rng = np.random.default_rng(0)
+    return [cluttered_desk(rng, textured=i % 2 == 1) for i in range(count)]
+
+
+def timed(function, contour_sets, params, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for contours in contour_sets:
+            function(contours, *params)
+    return (time.perf_counter() - start) * 1000 / (repeats * len(contour_sets))
+
+
+def main():
+    frames = load_frames(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not frames:
+        print("ERROR: no se encontraron imágenes")
+        return
+
+    repeats = 20
+    print(f"Frames: {len(frames)}")
+    for pipeline, (canny, params) in pipelines().items():
+        contour_sets = [contours_of(frame, pipeline, canny) for frame in frames]
+
+        for contours in contour_sets:
+            legacy = [c['bbox'] for c in legacy_candidates(contours, *params)]
+            current = [tuple(int(v) for v in c[['x', 'y', 'w', 'h']].tolist())
+                       for c in find_phone_candidates(contours, *params)]
+            assert legacy == current, (legacy, current)
+
+        legacy_ms = timed(legacy_candidates, contour_sets, params, repeats)
+        current_ms = timed(find_phone_candidates, contour_sets, params, repeats)
+        contours_per_frame = sum(len(c) for c in contour_sets) / len(contour_sets)
+
+        print(f"\n{pipeline} | Canny {canny[0]}/{canny[1]} | contornos por frame: {contours_per_frame:.0f}")
+        print(f"  Bucle original:        {legacy_ms:.3f} ms/frame")
+        print(f"  find_phone_candidates: {current_ms:.3f} ms/frame")
+        print(f"  Aceleración:           {legacy_ms / current_ms:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
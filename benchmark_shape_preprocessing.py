@@ -0,0 +1,140 @@
+"""Comparación de los modos de preprocesamiento de formas ('full' vs. 'fast')
+
+Uso:
+    python benchmark_shape_preprocessing.py grabacion.mp4
+    python benchmark_shape_preprocessing.py carpeta/        # imágenes .jpg/.png
+    python benchmark_shape_preprocessing.py                 # escritorios sintéticos
+
+Corre extract_phone_candidates en ambos modos sobre el mismo corpus (con un
+FrameContext nuevo por medición, sin caché compartida) y reporta ms/frame y
+la concordancia de los conjuntos de candidatos: cada caja del modo completo
+se empareja con la caja del modo rápido de mayor IoU. El resumen final
+junta velocidad y calidad: 'fast' solo conviene si el recall y la
+concordancia de decisiones alcanzan en el corpus propio.
+"""
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from detector_core import FrameContext, extract_phone_candidates
+
+# Mismos valores que OptimizedPhoneDetector.config
+CONFIG = {
+    'phone_min_area': 1500,
+    'phone_max_area': 80000,
+    'min_contour_solidity': 0.3,
+    'canny_low': 30,
+    'canny_high': 100,
+}
+MATCH_IOU = 0.5
+MIN_RECALL = 0.9  # Por debajo, 'fast' pierde demasiados candidatos de 'full'
+
+
+def load_corpus(path, limit=300):
+    """Frames de un video, de una carpeta de imágenes o sintéticos si no hay ruta"""
+    if path is None:
+        from benchmark_phone_candidates import cluttered_desk
+        print("INFO: sin corpus grabado, usando escritorios sintéticos")
+        rng = np.random.default_rng(0)
+        # Pocos escritorios dan un puñado de candidatos en 'full': hacen falta muchos para medir recall
+        return [cluttered_desk(rng, textured=i % 2 == 1) for i in range(150)]
+
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, '*.jpg')) + glob.glob(os.path.join(path, '*.png')))
+        frames = [cv2.imread(f) for f in files[:limit]]
+        return [f for f in frames if f is not None]
+
+    frames = []
+    cap = cv2.VideoCapture(path)
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run_mode(frames, mode):
+    """Candidatos por frame y tiempo medio en ms"""
+    results = []
+    start = time.perf_counter()
+    for frame in frames:
+        ctx = FrameContext(frame)
+        results.append(extract_phone_candidates(ctx, CONFIG['phone_min_area'], CONFIG['phone_max_area'],
+                                                CONFIG['min_contour_solidity'],
+                                                CONFIG['canny_low'], CONFIG['canny_high'], mode=mode))
+    return results, (time.perf_counter() - start) * 1000 / len(frames)
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
+
+
+def boxes_of(candidates):
+    return [tuple(int(v) for v in c[['x', 'y', 'w', 'h']].tolist()) for c in candidates]
+
+
+def agreement(full, fast):
+    """(IoU medio de cada caja completa con su mejor par, emparejadas, total completo, total rápido)"""
+    full_boxes, fast_boxes = boxes_of(full), boxes_of(fast)
+    best = [max((iou(a, b) for b in fast_boxes), default=0.0) for a in full_boxes]
+    matched = sum(1 for value in best if value >= MATCH_IOU)
+    return best, matched, len(full_boxes), len(fast_boxes)
+
+
+def main():
+    frames = load_corpus(sys.argv[1] if len(sys.argv) > 1 else None)
+    if not frames:
+        print("ERROR: corpus vacío")
+        return
+
+    # Una pasada de calentamiento para no medir la inicialización de OpenCV
+    run_mode(frames[:1], 'full')
+    run_mode(frames[:1], 'fast')
+
+    full_results, full_ms = run_mode(frames, 'full')
+    fast_results, fast_ms = run_mode(frames, 'fast')
+
+    ious = []
+    matched = full_total = fast_total = 0
+    frames_equal = 0
+    for full, fast in zip(full_results, fast_results):
+        best, frame_matched, frame_full, frame_fast = agreement(full, fast)
+        ious.extend(best)
+        matched += frame_matched
+        full_total += frame_full
+        fast_total += frame_fast
+        # Para el detector lo que importa es si hay o no candidatos en el frame
+        frames_equal += (frame_full > 0) == (frame_fast > 0)
+
+    recall = matched / full_total if full_total else 1.0
+    precision = matched / fast_total if fast_total else 1.0
+
+    print(f"Frames: {len(frames)} | resolución: {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"full: {full_ms:.2f} ms/frame | {full_total} candidatos")
+    print(f"fast: {fast_ms:.2f} ms/frame | {fast_total} candidatos")
+    print(f"Aceleración: {full_ms / fast_ms:.1f}x")
+    print(f"IoU medio (cajas de full contra su mejor par en fast): {np.mean(ious) if ious else 1.0:.3f}")
+    print(f"Cajas emparejadas (IoU >= {MATCH_IOU}): recall {recall:.1%} | precisión {precision:.1%}")
+    print(f"Frames con la misma decisión (hay / no hay celular): {frames_equal / len(frames):.1%}")
+
+    print(f"\nResumen: fast {full_ms / fast_ms:.1f}x más rápido, recall {recall:.1%}, "
+          f"misma decisión en {frames_equal / len(frames):.1%} de los frames")
+    if recall < MIN_RECALL:
+        print(f"WARNING: 'fast' encuentra menos del {MIN_RECALL:.0%} de los candidatos de 'full'; "
+              f"no usarlo sin revisar con grabaciones propias")
+
+
+if __name__ == '__main__':
+    main()
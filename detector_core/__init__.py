@@ -0,0 +1,64 @@
+"""Componentes compartidos por los detectores de uso de celular"""
+from .activity import ActivityRate
+from .budget import FrameBudget
+from .buffers import FrameBuffers
+from .cameras import (CAMERA_BACKENDS, CameraProbe, apply_capture_mode, device_fingerprint, measure_capture,
+                      rank_capture_modes, select_capture_mode)
+from .face_search import FaceSearch
+from .face_tracker import FaceTracker
+from .frame_context import FrameContext
+from .frame_grabber import FrameGrabber, FramePacket
+from .fusion import LazyFusion
+from .graph import DetectionGraph, Stage
+from .motion import MotionModel, merge_rectangles
+from .process_pipeline import FrameRecord, PROCESS_LAYOUTS, ProcessPipeline, SharedFrameRing
+from .raw_capture import RawDecoder
+from .resolution import ResolutionScaler
+from .results import Detection, faces_to_detections, scale_detections
+from .scheduler import StageSchedule
+from .shapes import (PHONE_CANDIDATE_DTYPE, candidates_to_detections, extract_phone_candidates,
+                     find_phone_candidates, foveal_phone_candidates, region_contours, rescale_candidates,
+                     shape_edges)
+from .static_gate import StaticGate
+
+__all__ = [
+    'ActivityRate',
+    'CAMERA_BACKENDS',
+    'CameraProbe',
+    'Detection',
+    'DetectionGraph',
+    'FaceSearch',
+    'FaceTracker',
+    'FrameBudget',
+    'FrameBuffers',
+    'FrameContext',
+    'FrameGrabber',
+    'FramePacket',
+    'FrameRecord',
+    'LazyFusion',
+    'MotionModel',
+    'PHONE_CANDIDATE_DTYPE',
+    'PROCESS_LAYOUTS',
+    'ProcessPipeline',
+    'RawDecoder',
+    'ResolutionScaler',
+    'SharedFrameRing',
+    'Stage',
+    'StageSchedule',
+    'StaticGate',
+    'apply_capture_mode',
+    'candidates_to_detections',
+    'device_fingerprint',
+    'extract_phone_candidates',
+    'faces_to_detections',
+    'find_phone_candidates',
+    'foveal_phone_candidates',
+    'measure_capture',
+    'merge_rectangles',
+    'rank_capture_modes',
+    'region_contours',
+    'rescale_candidates',
+    'scale_detections',
+    'select_capture_mode',
+    'shape_edges',
+]
@@ -0,0 +1,53 @@
+"""Ritmo de captura y análisis según la actividad frente a la cámara"""
+
+
+class ActivityRate:
+    """Elige los frames por segundo según lo que está pasando.
+
+    Tres niveles: 'idle' (sin rostro y casi sin movimiento), 'motion' (hay
+    un rostro o movimiento) y 'active' (sesión de uso en curso). Subir de
+    nivel es inmediato, para no perder el comienzo de un uso; bajar requiere
+    que el nivel menor se sostenga `idle_delay` segundos seguidos, así un
+    rostro que se pierde un instante no frena el análisis.
+    """
+
+    LEVELS = ('idle', 'motion', 'active')
+
+    def __init__(self, idle_fps=2.0, motion_fps=10.0, active_fps=20.0, motion_threshold=0.5, idle_delay=5.0):
+        self.fps_by_level = {'idle': idle_fps, 'motion': motion_fps, 'active': active_fps}
+        self.motion_threshold = motion_threshold
+        self.idle_delay = idle_delay
+        self.reset()
+
+    def reset(self):
+        """Volver al ritmo completo (al iniciar el monitoreo)"""
+        self.level = 'active'
+        self._lower_since = None
+
+    @property
+    def fps(self):
+        return self.fps_by_level[self.level]
+
+    def update(self, faces_count, motion_level, session_active, timestamp):
+        """Nivel para el próximo frame; `motion_level` en % del frame"""
+        if session_active:
+            target = 'active'
+        elif faces_count > 0 or motion_level >= self.motion_threshold:
+            target = 'motion'
+        else:
+            target = 'idle'
+
+        if self.LEVELS.index(target) >= self.LEVELS.index(self.level):
+            self.level = target
+            self._lower_since = None
+        elif self._lower_since is None:
+            self._lower_since = timestamp
+        elif timestamp - self._lower_since >= self.idle_delay:
+            # Se baja de a un nivel, reiniciando la espera
+            self.level = self.LEVELS[self.LEVELS.index(self.level) - 1]
+            self._lower_since = timestamp if self.level != target else None
+        return self.level
+
+    def sleep_time(self, elapsed):
+        """Segundos a dormir tras un frame que tardó `elapsed` segundos"""
+        return max(0.0, 1.0 / self.fps - elapsed)
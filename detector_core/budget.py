@@ -0,0 +1,59 @@
+"""Presupuesto de tiempo por frame: las etapas prescindibles ceden si no alcanza"""
+import time
+
+
+class FrameBudget:
+    """Lleva el tiempo gastado en el frame y decide qué etapas se descartan.
+
+    `start()` marca el comienzo del frame. Antes de una etapa prescindible se
+    pregunta `allows(nombre, costo_ms)`: si lo gastado más el costo esperado
+    supera `budget_ms`, la etapa se descarta y se cuenta en `shed`. Un
+    resultado degradado a tiempo vale más que uno completo y tarde, pero una
+    etapa descartada `max_streak` frames seguidos corre igual en el siguiente
+    para no quedar postergada para siempre en una máquina lenta.
+    `run` hace lo mismo para etapas fuera del grafo, midiendo su costo.
+    """
+
+    def __init__(self, budget_ms=40.0, max_streak=5, smoothing=0.2):
+        self.budget_ms = budget_ms
+        self.max_streak = max_streak
+        self.smoothing = smoothing
+        self.costs = {}
+        self.shed = {}
+        self._streaks = {}
+        self._start = None
+
+    def start(self):
+        """Comienzo de un frame nuevo"""
+        self._start = time.perf_counter()
+
+    def elapsed_ms(self):
+        """Milisegundos gastados desde start()"""
+        if self._start is None:
+            return 0.0
+        return (time.perf_counter() - self._start) * 1000
+
+    def allows(self, name, cost_ms):
+        """True si la etapa entra en lo que queda del presupuesto"""
+        streak = self._streaks.get(name, 0)
+        if (not self.budget_ms or self._start is None or streak >= self.max_streak
+                or self.elapsed_ms() + cost_ms <= self.budget_ms):
+            self._streaks[name] = 0
+            return True
+
+        self._streaks[name] = streak + 1
+        self.shed[name] = self.shed.get(name, 0) + 1
+        return False
+
+    def run(self, name, compute, fallback=None):
+        """Correr `compute()` si entra en el presupuesto; si no, devolver `fallback`"""
+        if not self.allows(name, self.costs.get(name, 0.0)):
+            return fallback
+
+        start = time.perf_counter()
+        value = compute()
+        elapsed = (time.perf_counter() - start) * 1000
+
+        previous = self.costs.get(name)
+        self.costs[name] = elapsed if previous is None else previous + self.smoothing * (elapsed - previous)
+        return value
@@ -0,0 +1,73 @@
+"""Buffers preasignados y reutilizados entre frames"""
+import numpy as np
+
+
+class FrameBuffers:
+    """Arrays con nombre que se reservan una vez y se pasan como `dst=`.
+
+    Hay dos juegos que se alternan con `next_frame()`: lo escrito durante
+    el frame anterior sigue intacto un frame más (por ejemplo, el gris que
+    se guarda para comparar movimiento) y lo de hace dos frames se
+    sobrescribe en lugar de reservar memoria nueva. Un array solo se vuelve
+    a reservar cuando cambia su forma o su tipo.
+
+    Quien necesite un array por más de un frame debe copiarlo a un buffer
+    propio; los de este pool no sobreviven a dos `next_frame()`.
+
+    Con `enabled=False`, `get` devuelve None y OpenCV reserva cada salida
+    como siempre (útil para comparar).
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._sets = ({}, {})
+        self._current = 0
+
+        # Estadísticas
+        self.allocations = 0
+
+    def next_frame(self):
+        """Pasar al otro juego de buffers (al comenzar cada frame)"""
+        self._current ^= 1
+
+    def get(self, name, shape, dtype=np.uint8):
+        """Buffer `name` del juego actual con esa forma y tipo (contenido indefinido)"""
+        if not self.enabled:
+            return None
+        buffers = self._sets[self._current]
+        shape = tuple(shape)
+        buffer = buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = buffers[name] = np.empty(shape, dtype)
+            self.allocations += 1
+        return buffer
+
+    def like(self, name, array):
+        """Buffer `name` con la forma y el tipo de `array`"""
+        return self.get(name, array.shape, array.dtype)
+
+    def copy(self, name, array):
+        """Copia de `array` en el buffer `name` (o una copia nueva si el pool está apagado)"""
+        buffer = self.like(name, array)
+        if buffer is None:
+            return array.copy()
+        np.copyto(buffer, array)
+        return buffer
+
+    def presize(self):
+        """Reservar en los dos juegos los buffers que hasta ahora solo usó uno.
+
+        Una etapa que corre a bajo ritmo puede haber caído siempre en el
+        mismo juego; sin esto reservaría el del otro la primera vez que le
+        toque, mucho después de arrancar.
+        """
+        for source, target in ((0, 1), (1, 0)):
+            for name, buffer in self._sets[source].items():
+                if name not in self._sets[target]:
+                    self._sets[target][name] = np.empty_like(buffer)
+                    self.allocations += 1
+
+    def clear(self):
+        """Soltar todos los buffers (al cambiar de cámara o de resolución)"""
+        for buffers in self._sets:
+            buffers.clear()
@@ -0,0 +1,446 @@
+"""Búsqueda de cámaras en paralelo, con caché en disco por equipo"""
+import glob
+import hashlib
+import json
+import os
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+# Nombre de backend (como se guarda en la caché) -> constante de OpenCV
+CAMERA_BACKENDS = {
+    "DirectShow": cv2.CAP_DSHOW,
+    "Media Foundation": cv2.CAP_MSMF,
+    "V4L2": cv2.CAP_V4L2,
+    "Auto": cv2.CAP_ANY,
+    "Default": cv2.CAP_ANY,
+}
+
+# Modos que se prueban al medir una cámara (el backend puede entregar otro)
+CAPTURE_RESOLUTIONS = ((320, 240), (640, 360), (640, 480), (800, 600), (1280, 720), (1920, 1080))
+CAPTURE_FPS = (15, 30)
+CAPTURE_FOURCCS = ('MJPG', 'YUYV')
+
+
+def fourcc_name(code):
+    """Código FOURCC numérico de OpenCV como texto ('MJPG', 'YUYV', ...)"""
+    code = int(code)
+    return ''.join(chr((code >> (8 * i)) & 0xFF) for i in range(4)).strip('\x00 ') or '?'
+
+
+def apply_capture_mode(cap, mode):
+    """Pedir a la cámara el modo (FOURCC primero: varios backends lo exigen)"""
+    if mode.get('fourcc') and mode['fourcc'] != '?':
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode['fourcc']))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode['width'])
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode['height'])
+    cap.set(cv2.CAP_PROP_FPS, mode['fps'])
+
+
+def measure_capture(cap, burst=20, warmup=3):
+    """(FPS entregados, ms por read(), ms de CPU por frame) en una ráfaga; None si falla"""
+    for _ in range(warmup):
+        ret, _ = cap.read()
+        if not ret:
+            return None
+
+    reads = []
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for _ in range(burst):
+        start = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            return None
+        reads.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    return burst / wall, 1000 * sum(reads) / burst, 1000 * cpu / burst
+
+
+def rank_capture_modes(modes):
+    """Modos del más barato al más caro: CPU por frame (a 0.1 ms, para no ordenar ruido), después píxeles"""
+    return sorted(modes, key=lambda m: (round(m['cpu_ms'], 1), m['width'] * m['height']))
+
+
+def select_capture_mode(modes, min_size=(640, 360), min_fps=20, index=None):
+    """Primer modo del perfil (ya ordenado) que cumple resolución y FPS mínimos"""
+    min_width, min_height = min_size
+    for mode in modes:
+        if index is not None and mode['index'] != index:
+            continue
+        if (mode['width'] >= min_width and mode['height'] >= min_height
+                and mode['delivered_fps'] >= 0.9 * min_fps):
+            return mode
+    return None
+
+
+def _read_entry(path, key):
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            return json.load(f).get(key)
+    return None
+
+
+def _write_entry(path, key, value):
+    data = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+    data[key] = value
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+# Categorías de interfaces de dispositivo que enumeran DirectShow y Media Foundation
+# (KSCATEGORY_VIDEO_CAMERA y KSCATEGORY_VIDEO)
+_WINDOWS_VIDEO_CLASSES = ('{E5323777-F976-4F5B-9B55-B94699C46E44}', '{6994AD05-93EF-11D0-A3CC-00A0C9223196}')
+
+
+def _windows_video_devices():
+    """Interfaces de video conectadas según el registro de Windows (sin abrir ninguna cámara).
+
+    DeviceClasses guarda todas las que se conectaron alguna vez; solo las
+    presentes tienen la subclave volátil Control con Linked = 1.
+    """
+    try:
+        import winreg
+    except ImportError:
+        return []
+
+    def linked_reference(key, reference):
+        try:
+            with winreg.OpenKey(key, reference + r'\Control') as control:
+                return winreg.QueryValueEx(control, 'Linked')[0] == 1
+        except OSError:
+            return False
+
+    devices = set()
+    for category in _WINDOWS_VIDEO_CLASSES:
+        try:
+            root = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE,
+                                  rf'SYSTEM\CurrentControlSet\Control\DeviceClasses\{category}')
+        except OSError:
+            continue
+        with root:
+            for i in range(winreg.QueryInfoKey(root)[0]):
+                interface = winreg.EnumKey(root, i)
+                try:
+                    with winreg.OpenKey(root, interface) as key:
+                        references = [winreg.EnumKey(key, j) for j in range(winreg.QueryInfoKey(key)[0])]
+                        linked = any(linked_reference(key, reference) for reference in references)
+                except OSError:
+                    continue
+                if linked:
+                    devices.add(interface.lower())
+    return sorted(devices)
+
+
+def device_fingerprint():
+    """Huella del equipo y sus dispositivos de video (cambia al conectar otra cámara)"""
+    parts = [platform.system(), platform.node(), cv2.__version__]
+    if platform.system() == 'Windows':
+        parts.extend(_windows_video_devices())
+    parts.extend(sorted(glob.glob('/dev/video*')))
+    for path in sorted(glob.glob('/sys/class/video4linux/*/name')):
+        try:
+            with open(path) as f:
+                parts.append(f.read().strip())
+        except OSError:
+            continue
+    return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+class CameraProbe:
+    """Encuentra las cámaras que funcionan sin bloquear el arranque.
+
+    Cada índice se prueba en su propio hilo, recorriendo `backends` en orden
+    hasta que uno abre y entrega un frame; cada intento tiene `timeout`
+    segundos (un intento vencido se abandona y, si termina abriendo la
+    cámara, la libera él mismo). Cada cámara que abre queda disponible para
+    `take()` en cuanto su índice responde, sin esperar a los demás (se
+    retiene la de menor índice); sin `take()` se libera a los
+    `hold_seconds` segundos (LED apagado, dispositivo libre para otras
+    aplicaciones).
+
+    `discover()` nunca bloquea: devuelve la lista guardada en `cache_file`
+    para la huella del equipo (vacía si no hay) y prueba en segundo plano.
+    `take()` espera a esa búsqueda como mucho `wait` segundos; si sigue en
+    curso la cancela y entrega la cámara ya abierta, si la hay (si no, None
+    y el llamador abre la cámara él mismo).
+
+    `benchmark()` mide cada modo (backend, resolución, FPS, FOURCC) y guarda
+    en `profile_file` el perfil ordenado por costo; `open_mode()` abre la
+    cámara con el modo más barato que cumple los mínimos de los detectores.
+    """
+
+    def __init__(self, backends=("DirectShow", "Media Foundation", "Auto"), indices=(0, 1, 2),
+                 timeout=3.0, cache_file='camera_cache.json', profile_file='camera_profile.json',
+                 hold_seconds=10.0):
+        self.backends = tuple(backends)
+        self.indices = tuple(indices)
+        self.timeout = timeout
+        self.hold_seconds = hold_seconds
+        self.cache_file = cache_file
+        self.profile_file = profile_file
+        self.fingerprint = device_fingerprint()
+
+        self._lock = threading.Lock()
+        self._held = None  # (info, cap) abierta por la última búsqueda
+        self._hold_timer = None
+        self._cancelled = threading.Event()
+        self._revalidation = None
+
+    def discover(self, on_update=None):
+        """Cámaras conocidas al instante; `on_update(cámaras)` recibe el resultado si cambió"""
+        cached = self.load_cached()
+        if cached is not None:
+            print(f"INFO: {len(cached)} cámara(s) desde la caché; revalidando en segundo plano")
+
+        def revalidate():
+            cameras = self.probe()
+            if self._cancelled.is_set():
+                return
+            self.save(cameras)
+            if on_update is not None and cameras != cached:
+                on_update(cameras)
+
+        self._cancelled.clear()
+        self._revalidation = threading.Thread(target=revalidate, name="CameraProbe", daemon=True)
+        self._revalidation.start()
+        return cached if cached is not None else []
+
+    def probe(self):
+        """Probar todos los índices en paralelo"""
+        with ThreadPoolExecutor(max_workers=len(self.indices)) as pool:
+            return [info for info in pool.map(self._probe_and_offer, self.indices) if info is not None]
+
+    def _probe_and_offer(self, index):
+        """Probar un índice y ofrecer su cámara a `take()` apenas abre; la que no se retiene se libera"""
+        found = self._probe_index(index)
+        if found is None:
+            return None
+
+        info, cap = found
+        with self._lock:
+            keep = not self._cancelled.is_set() and (self._held is None or index < self._held[0]['index'])
+            if keep:
+                self._release_held()
+                self._held = found
+                self._hold_timer = threading.Timer(self.hold_seconds, self._expire, args=(cap,))
+                self._hold_timer.daemon = True
+                self._hold_timer.start()
+        if not keep:
+            cap.release()
+        return info
+
+    def take(self, camera_info=None, wait=0.5):
+        """La cámara abierta por la búsqueda (None si no hay o no coincide); pasa a ser del llamador"""
+        revalidation = self._revalidation
+        cancelled = False
+        if revalidation is not None and revalidation.is_alive():
+            # Se llama desde la GUI: una espera corta, no la búsqueda completa. Lo que
+            # la búsqueda ya abrió se entrega igual; lo que abra después lo libera ella
+            revalidation.join(wait)
+            if revalidation.is_alive():
+                self._cancelled.set()
+                cancelled = True
+
+        with self._lock:
+            if self._held is None:
+                if cancelled:
+                    print("INFO: Búsqueda de cámaras en curso; se abre la cámara directamente")
+                return None
+            info, cap = self._held
+            self._held = None
+            self._cancel_hold_timer()
+
+        matches = camera_info is None or (camera_info.get('index') == info['index']
+                                          and camera_info.get('backend') == info['backend'])
+        if matches and cap.isOpened():
+            return cap
+        cap.release()
+        return None
+
+    def release(self):
+        """Liberar la cámara retenida (al cerrar la aplicación)"""
+        self._cancelled.set()
+        with self._lock:
+            self._release_held()
+
+    def _release_held(self):
+        self._cancel_hold_timer()
+        if self._held is not None:
+            self._held[1].release()
+            self._held = None
+
+    def _cancel_hold_timer(self):
+        if self._hold_timer is not None:
+            self._hold_timer.cancel()
+            self._hold_timer = None
+
+    def _expire(self, cap):
+        """Liberar la cámara retenida si nadie la tomó a tiempo"""
+        with self._lock:
+            if self._held is not None and self._held[1] is cap:
+                self._held = None
+                self._hold_timer = None
+                cap.release()
+                print(f"INFO: Cámara liberada tras {self.hold_seconds:g}s sin iniciar")
+
+    def _probe_index(self, index):
+        for backend in self.backends:
+            result = self._try_open(index, backend)
+            if result is not None:
+                return result
+        return None
+
+    def _try_open(self, index, backend):
+        """(info, cap) si la cámara abre y entrega un frame dentro del timeout"""
+        result = []
+        abandoned = threading.Event()
+
+        def attempt():
+            cap = None
+            try:
+                cap = cv2.VideoCapture(index, CAMERA_BACKENDS.get(backend, cv2.CAP_ANY))
+                if cap.isOpened():
+                    ret, frame = cap.read()
+                    if ret and frame is not None:
+                        info = {
+                            'index': index,
+                            'backend': backend,
+                            'resolution': f"{frame.shape[1]}x{frame.shape[0]}",
+                            'fps': int(cap.get(cv2.CAP_PROP_FPS))
+                        }
+                        with self._lock:
+                            if not abandoned.is_set():
+                                result.append((info, cap))
+                                return
+            except Exception as e:
+                print(f"ERROR: Error probando cámara {index} ({backend}): {e}")
+            if cap is not None:
+                cap.release()
+
+        thread = threading.Thread(target=attempt, daemon=True)
+        thread.start()
+        thread.join(self.timeout)
+
+        with self._lock:
+            if not result:
+                abandoned.set()
+                if thread.is_alive():
+                    print(f"WARNING: Cámara {index} ({backend}) no respondió en {self.timeout:g}s")
+                return None
+
+        info = result[0][0]
+        print(f"OK: Cámara {index}: {backend} - {info['resolution']} @ {info['fps']}fps")
+        return result[0]
+
+    def load_cached(self):
+        """Lista guardada para este equipo, o None"""
+        try:
+            return _read_entry(self.cache_file, self.fingerprint)
+        except Exception as e:
+            print(f"ERROR: Error leyendo caché de cámaras: {e}")
+        return None
+
+    def save(self, cameras):
+        """Guardar la lista para este equipo (una lista vacía no se guarda)"""
+        if not cameras:
+            return
+        try:
+            _write_entry(self.cache_file, self.fingerprint, cameras)
+        except Exception as e:
+            print(f"ERROR: Error guardando caché de cámaras: {e}")
+
+    def benchmark(self, indices=None, backends=None, resolutions=CAPTURE_RESOLUTIONS, fps_options=CAPTURE_FPS,
+                  fourccs=CAPTURE_FOURCCS, burst=20):
+        """Medir todos los modos de cada cámara y guardar el perfil ordenado"""
+        self.release()
+        modes = {}
+        for index in indices if indices is not None else self.indices:
+            for backend in backends if backends is not None else self.backends:
+                cap = cv2.VideoCapture(index, CAMERA_BACKENDS.get(backend, cv2.CAP_ANY))
+                try:
+                    if not cap.isOpened():
+                        continue
+                    for fourcc in fourccs:
+                        for width, height in resolutions:
+                            for fps in fps_options:
+                                mode = self._measure_mode(cap, index, backend, width, height, fps, fourcc, burst)
+                                if mode is None:
+                                    continue
+                                # El backend redondea a lo que soporta: se guarda el modo real una vez
+                                key = (index, backend, mode['width'], mode['height'], mode['fps'], mode['fourcc'])
+                                if key not in modes or mode['cpu_ms'] < modes[key]['cpu_ms']:
+                                    modes[key] = mode
+                finally:
+                    cap.release()
+
+        profile = rank_capture_modes(modes.values())
+        try:
+            _write_entry(self.profile_file, self.fingerprint, profile)
+        except Exception as e:
+            print(f"ERROR: Error guardando perfil de cámaras: {e}")
+        return profile
+
+    def _measure_mode(self, cap, index, backend, width, height, fps, fourcc, burst):
+        try:
+            apply_capture_mode(cap, {'width': width, 'height': height, 'fps': fps, 'fourcc': fourcc})
+            measured = measure_capture(cap, burst)
+        except Exception as e:
+            print(f"ERROR: Error midiendo {backend} {width}x{height}@{fps} {fourcc}: {e}")
+            return None
+        if measured is None:
+            return None
+
+        delivered_fps, read_ms, cpu_ms = measured
+        mode = {
+            'index': index,
+            'backend': backend,
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            'fps': fps,
+            'fourcc': fourcc_name(cap.get(cv2.CAP_PROP_FOURCC)),
+            'delivered_fps': round(delivered_fps, 1),
+            'read_ms': round(read_ms, 2),
+            'cpu_ms': round(cpu_ms, 2)
+        }
+        print(f"{backend} {mode['width']}x{mode['height']} {mode['fourcc']} @ {fps}: "
+              f"{mode['delivered_fps']} fps entregados | read {mode['read_ms']} ms | CPU {mode['cpu_ms']} ms")
+        return mode
+
+    def load_profile(self):
+        """Perfil medido de este equipo (lista ordenada de modos), o None"""
+        try:
+            return _read_entry(self.profile_file, self.fingerprint)
+        except Exception as e:
+            print(f"ERROR: Error leyendo perfil de cámaras: {e}")
+        return None
+
+    def open_mode(self, min_size=(640, 360), min_fps=20, index=None):
+        """(cap, modo) con el modo más barato que cumple los mínimos; (None, None) sin perfil"""
+        mode = select_capture_mode(self.load_profile() or [], min_size, min_fps, index)
+        if mode is None:
+            return None, None
+
+        cap = self.take(mode)
+        if cap is None:
+            cap = cv2.VideoCapture(mode['index'], CAMERA_BACKENDS.get(mode['backend'], cv2.CAP_ANY))
+            if not cap.isOpened():
+                cap.release()
+                return None, None
+
+        apply_capture_mode(cap, mode)
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            cap.release()
+            return None, None
+
+        print(f"OK: Modo de captura {mode['backend']} {mode['width']}x{mode['height']} "
+              f"{mode['fourcc']} @ {mode['fps']} ({mode['cpu_ms']} ms CPU/frame)")
+        return cap, mode
@@ -0,0 +1,82 @@
+"""Búsqueda Haar restringida a ventanas alrededor de los últimos rostros"""
+import numpy as np
+
+
+class FaceSearch:
+    """Corre detectMultiScale solo cerca de donde estaba el rostro.
+
+    Con una pista (cajas del frame anterior) busca en una ventana ampliada
+    alrededor de cada caja y en una banda estrecha de tamaños derivada de la
+    caja previa. Si no encuentra nada, o cada `full_scan_interval` búsquedas,
+    vuelve a escanear el frame completo con los parámetros originales.
+    """
+
+    def __init__(self, cascade, expand=0.5, size_band=(0.75, 1.35), full_scan_interval=15):
+        self.cascade = cascade
+        self.expand = expand
+        self.size_band = size_band
+        self.full_scan_interval = full_scan_interval
+        self._searches_since_full = 0
+
+        # Estadísticas
+        self.full_scans = 0
+        self.roi_scans = 0
+        self.roi_misses = 0
+
+    def reset(self):
+        self._searches_since_full = 0
+
+    def detect(self, gray, scale_factor, min_neighbors, min_size, max_size, hint=None):
+        """Rostros como array (n, 4); `hint` son las cajas conocidas más recientes"""
+        if hint is not None and len(hint) > 0 and self._searches_since_full < self.full_scan_interval:
+            faces = self._detect_around(gray, scale_factor, min_neighbors, min_size, max_size, hint)
+            if len(faces) > 0:
+                self._searches_since_full += 1
+                self.roi_scans += 1
+                return faces
+            self.roi_misses += 1
+
+        self._searches_since_full = 0
+        self.full_scans += 1
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=scale_factor, minNeighbors=min_neighbors,
+                                              minSize=min_size, maxSize=max_size)
+        return np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+
+    def _detect_around(self, gray, scale_factor, min_neighbors, min_size, max_size, hint):
+        height, width = gray.shape[:2]
+        low, high = self.size_band
+        found = []
+
+        for (x, y, w, h) in hint:
+            # Ventana ampliada alrededor de la caja previa
+            mx, my = int(w * self.expand), int(h * self.expand)
+            x0, y0 = max(0, x - mx), max(0, y - my)
+            x1, y1 = min(width, x + w + mx), min(height, y + h + my)
+
+            # Banda de tamaños alrededor del tamaño previo, dentro de los límites globales
+            band_min = (max(min_size[0], int(w * low)), max(min_size[1], int(h * low)))
+            band_max = (min(max_size[0], int(w * high)), min(max_size[1], int(h * high)))
+            if band_min[0] > band_max[0] or band_min[1] > band_max[1]:
+                continue
+            if x1 - x0 < band_min[0] or y1 - y0 < band_min[1]:
+                continue
+
+            faces = self.cascade.detectMultiScale(gray[y0:y1, x0:x1], scaleFactor=scale_factor,
+                                                  minNeighbors=min_neighbors, minSize=band_min, maxSize=band_max)
+            for (fx, fy, fw, fh) in faces:
+                box = (fx + x0, fy + y0, fw, fh)
+                # Ventanas de rostros cercanos pueden solaparse: descartar duplicados
+                if all(_iou(box, other) < 0.5 for other in found):
+                    found.append(box)
+
+        return np.array(found, dtype=np.int32).reshape(-1, 4)
+
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    ih = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = iw * ih
+    union = aw * ah + bw * bh - inter
+    return inter / union if union > 0 else 0.0
@@ -0,0 +1,126 @@
+"""Seguimiento de rostros entre detecciones Haar espaciadas"""
+import cv2
+import numpy as np
+
+
+class FaceTracker:
+    """Sigue las cajas de rostro con flujo óptico Lucas-Kanade disperso.
+
+    El cascade solo corre cada `redetect_interval` frames o cuando el
+    seguimiento se pierde; entre medio, cada caja se desplaza con la mediana
+    del movimiento de sus puntos característicos. La confianza de una caja es
+    la fracción de sus puntos que sobrevive al chequeo ida y vuelta del flujo.
+    """
+
+    def __init__(self, redetect_interval=10, min_points=6, min_confidence=0.6,
+                 max_corners=30, fb_threshold=1.0):
+        self.redetect_interval = redetect_interval
+        self.min_points = min_points
+        self.min_confidence = min_confidence
+        self.max_corners = max_corners
+        self.fb_threshold = fb_threshold
+
+        # Estadísticas
+        self.detections = 0
+        self.tracked_frames = 0
+        self.losses = 0
+
+        self.reset()
+
+    def reset(self):
+        """Olvidar el estado; el próximo update corre el cascade"""
+        self._prev_gray = None
+        self._faces = np.empty((0, 4), np.int32)
+        self._points = []
+        self._frames_since_detection = 0
+        self.confidence = 0.0
+
+    def update(self, gray, detect):
+        """Rostros del frame actual como array (n, 4) de x, y, w, h.
+
+        `detect` es una función sin argumentos que corre el cascade completo.
+        """
+        needs_detection = (self._prev_gray is None
+                           or self._prev_gray.shape != gray.shape
+                           or self._frames_since_detection >= self.redetect_interval)
+
+        if not needs_detection and len(self._faces) > 0:
+            if not self._track(gray):
+                self.losses += 1
+                needs_detection = True
+
+        if needs_detection:
+            faces = detect()
+            self._faces = np.asarray(faces, dtype=np.int32).reshape(-1, 4)
+            self._points = [self._find_points(gray, face) for face in self._faces]
+            self._frames_since_detection = 0
+            self.confidence = 1.0
+            self.detections += 1
+        else:
+            self._frames_since_detection += 1
+            self.tracked_frames += 1
+
+        # Copia propia: el gris del contexto puede estar en un buffer que se reutiliza
+        if self._prev_gray is None or self._prev_gray.shape != gray.shape:
+            self._prev_gray = np.empty_like(gray)
+        np.copyto(self._prev_gray, gray)
+        return self._faces.copy()
+
+    def _find_points(self, gray, face):
+        """Puntos característicos dentro del 80% central de la caja"""
+        x, y, w, h = face
+        mask = np.zeros(gray.shape, np.uint8)
+        mx, my = w // 10, h // 10
+        mask[y + my:y + h - my, x + mx:x + w - mx] = 255
+
+        points = cv2.goodFeaturesToTrack(gray, maxCorners=self.max_corners, qualityLevel=0.01,
+                                         minDistance=5, mask=mask)
+        if points is None:
+            return np.empty((0, 1, 2), np.float32)
+        return points
+
+    def _track(self, gray):
+        """Desplazar las cajas con flujo óptico; False si alguna se perdió"""
+        counts = [len(points) for points in self._points]
+        if min(counts) < self.min_points:
+            return False
+
+        prev_points = np.concatenate(self._points).astype(np.float32)
+        lk_params = dict(winSize=(15, 15), maxLevel=2,
+                         criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+
+        next_points, status, _ = cv2.calcOpticalFlowPyrLK(self._prev_gray, gray, prev_points, None, **lk_params)
+        back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._prev_gray, next_points, None, **lk_params)
+
+        fb_error = np.linalg.norm((prev_points - back_points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.fb_threshold)
+
+        height, width = gray.shape[:2]
+        new_faces = []
+        new_points = []
+        confidences = []
+        start = 0
+
+        for face, count in zip(self._faces, counts):
+            face_good = good[start:start + count]
+            face_prev = prev_points[start:start + count][face_good].reshape(-1, 2)
+            face_next = next_points[start:start + count][face_good].reshape(-1, 2)
+            start += count
+
+            confidence = face_good.sum() / count
+            if len(face_next) < self.min_points or confidence < self.min_confidence:
+                return False
+
+            dx, dy = np.median(face_next - face_prev, axis=0)
+            x, y, w, h = face
+            x = int(np.clip(round(x + dx), 0, max(0, width - w)))
+            y = int(np.clip(round(y + dy), 0, max(0, height - h)))
+
+            new_faces.append((x, y, w, h))
+            new_points.append(face_next.reshape(-1, 1, 2))
+            confidences.append(confidence)
+
+        self._faces = np.array(new_faces, np.int32).reshape(-1, 4)
+        self._points = new_points
+        self.confidence = float(min(confidences))
+        return True
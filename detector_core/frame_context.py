@@ -0,0 +1,172 @@
+"""Contexto por frame con imágenes derivadas calculadas una sola vez"""
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+
+class _FrameResults(dict):
+    """Resultados del frame que anotan, por hilo, qué claves escribe cada etapa"""
+
+    def __init__(self):
+        super().__init__()
+        self._local = threading.local()
+
+    def __setitem__(self, key, value):
+        dict.__setitem__(self, key, value)
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            stack[-1][key] = value
+
+    def update(self, other=(), **kwargs):
+        for key, value in dict(other, **kwargs).items():
+            self[key] = value
+
+    @contextmanager
+    def recording(self):
+        """Anotar lo que este hilo escribe dentro del bloque (sin lo de grabaciones anidadas)"""
+        stack = self._local.__dict__.setdefault('stack', [])
+        written = {}
+        stack.append(written)
+        try:
+            yield written
+        finally:
+            stack.pop()
+
+
+class FrameContext:
+    """Frame BGR y sus derivados (gris, ecualizado, suavizados, reducidos).
+
+    Cada derivado se calcula la primera vez que algún detector lo pide y se
+    reutiliza durante el resto del frame. Un contexto vive lo que dura una
+    iteración de `detection_loop` y no debe compartirse entre frames.
+
+    `results` guarda los resultados estructurados que produce cada detector
+    (listas de Detection por clave) para que los overlays solo los dibujen.
+
+    `source` es el frame de captura del que se redujo `frame`, si difiere
+    (procesamiento foveado): los detectores trabajan sobre `frame` y solo
+    leen recortes de `source` como vistas, sin copiarlo ni convertirlo.
+
+    Con captura cruda el contexto nace con `gray` ya calculado y `frame` en
+    None: el BGR se produce con `color()` recién cuando alguien lo pide.
+
+    Con `buffers` (FrameBuffers) los derivados se escriben en buffers
+    preasignados en vez de reservar arrays nuevos en cada frame.
+
+    Varios hilos pueden pedir derivados a la vez: cada clave se calcula una
+    sola vez y quien llega mientras otro la calcula espera su valor.
+    """
+
+    def __init__(self, frame, seq=0, timestamp=None, source=None, gray=None, color=None, buffers=None):
+        self._frame = frame
+        self._color = color
+        self._source = source
+        self.buffers = buffers
+        self.seq = seq
+        self.timestamp = timestamp if timestamp is not None else time.time()
+        self._cache = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.results = _FrameResults()
+        if gray is not None:
+            self._cache['gray'] = gray
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            self._frame = self.cached('color', self._color)
+        return self._frame
+
+    @property
+    def source(self):
+        if self._source is not None:
+            return self._source
+        return self._frame if self._frame is not None else self.gray
+
+    @property
+    def shape(self):
+        """Forma del frame de procesamiento (la del gris si todavía no hay BGR)"""
+        if self._frame is None:
+            return self.gray.shape
+        return self._frame.shape
+
+    @property
+    def source_scale(self):
+        """Factor de coordenadas de `frame` a coordenadas de `source`"""
+        return self.source.shape[1] / float(self.shape[1])
+
+    def buffer(self, name, shape, dtype=np.uint8):
+        """Buffer de salida para `dst=`; None sin pool (OpenCV reserva la salida)"""
+        if self.buffers is None:
+            return None
+        return self.buffers.get(name, shape, dtype)
+
+    def _scaled_shape(self, image, scale):
+        height, width = image.shape[:2]
+        return (int(round(height * scale)), int(round(width * scale))) + image.shape[2:]
+
+    def cached(self, key, compute):
+        """Devolver el valor memorizado bajo `key`, calculándolo si falta"""
+        try:
+            return self._cache[key]
+        except KeyError:
+            pass
+
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            try:
+                return self._cache[key]
+            except KeyError:
+                value = self._cache[key] = compute()
+                return value
+
+    @property
+    def gray(self):
+        return self.cached('gray', lambda: cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY,
+                                                        dst=self.buffer('gray', self.frame.shape[:2])))
+
+    @property
+    def equalized(self):
+        """Gris con ecualización de histograma (entrada del cascade facial)"""
+        return self.cached('equalized', lambda: cv2.equalizeHist(self.gray,
+                                                                 dst=self.buffer('equalized', self.gray.shape)))
+
+    def blurred(self, ksize=21):
+        """Gris con desenfoque gaussiano de `ksize` x `ksize`"""
+        key = ('blurred', ksize)
+        return self.cached(key, lambda: cv2.GaussianBlur(self.gray, (ksize, ksize), 0,
+                                                         dst=self.buffer(key, self.gray.shape)))
+
+    @property
+    def bilateral(self):
+        """Gris con filtro bilateral (preprocesamiento de formas)"""
+        return self.cached('bilateral', lambda: cv2.bilateralFilter(self.gray, 9, 75, 75,
+                                                                    dst=self.buffer('bilateral', self.gray.shape)))
+
+    def scaled_bilateral(self, scale, diameter=5):
+        """Gris reducido por `scale` con un filtro bilateral chico (modo rápido de formas)"""
+        key = ('scaled_bilateral', scale, diameter)
+        return self.cached(key, lambda: cv2.bilateralFilter(
+            self.scaled_gray(scale), diameter, 75, 75, dst=self.buffer(key, self.scaled_gray(scale).shape)))
+
+    def scaled_gray(self, scale):
+        """Gris reducido por `scale` (1.0 devuelve el gris original)"""
+        if scale == 1.0:
+            return self.gray
+        key = ('scaled_gray', scale)
+        return self.cached(key, lambda: cv2.resize(
+            self.gray, None, dst=self.buffer(key, self._scaled_shape(self.gray, scale)),
+            fx=scale, fy=scale, interpolation=cv2.INTER_AREA))
+
+    def scaled_frame(self, scale):
+        """Frame BGR reducido por `scale`"""
+        if scale == 1.0:
+            return self.frame
+        key = ('scaled_frame', scale)
+        return self.cached(key, lambda: cv2.resize(
+            self.frame, None, dst=self.buffer(key, self._scaled_shape(self.frame, scale)),
+            fx=scale, fy=scale, interpolation=cv2.INTER_AREA))
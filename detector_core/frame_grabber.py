@@ -0,0 +1,195 @@
+"""Captura de cámara en un hilo dedicado con un anillo acotado de buffers"""
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# Frame entregado al consumidor: número de secuencia, instante de captura,
+# imagen BGR (vista del buffer del anillo) y slot que ocupa
+FramePacket = namedtuple('FramePacket', ['seq', 'timestamp', 'frame', 'slot'])
+
+
+class FrameGrabber:
+    """Lee la cámara continuamente y conserva solo los frames más nuevos.
+
+    El hilo de captura escribe en un anillo de buffers numpy preasignados y
+    sobrescribe siempre el más viejo, así que un consumidor lento nunca
+    acumula frames atrasados. El slot entregado por `read_latest` no se
+    reutiliza hasta la siguiente llamada a `read_latest`.
+
+    La cámara se libera desde el propio hilo de captura al salir del bucle,
+    de modo que `stop()` nunca cierra el dispositivo con un `read()` en curso.
+    """
+
+    def __init__(self, cap, ring_size=3, max_errors=10):
+        if ring_size < 3:
+            raise ValueError("ring_size debe ser al menos 3")
+
+        self.cap = cap
+        self.ring_size = ring_size
+        self.max_errors = max_errors
+
+        self._ring = [None] * ring_size
+        self._seqs = [0] * ring_size
+        self._timestamps = [0.0] * ring_size
+        self._latest_slot = None
+        self._held_slot = None
+        self._consumed_seq = 0
+        self._seq = 0
+        self._pending_fps = None
+
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        # Estado observable
+        self.failed = False
+        self.dropped_frames = 0
+        self.fps_supported = None  # None hasta el primer set_fps
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Preasignar el anillo e iniciar el hilo de captura"""
+        if self.running:
+            return
+
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if width > 0 and height > 0:
+            self._ring = [np.empty((height, width, 3), np.uint8) for _ in range(self.ring_size)]
+
+        self._stop_event.clear()
+        self.failed = False
+        self._thread = threading.Thread(target=self._capture_loop, name="FrameGrabber", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Detener la captura y esperar a que el hilo libere la cámara"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+
+        if self._thread is None:
+            # Nunca arrancó: la cámara es nuestra y no hay lecturas en curso
+            self._release_capture()
+            return True
+
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+        stopped = not self._thread.is_alive()
+        if not stopped:
+            print("WARNING: La captura sigue bloqueada en read(); se liberará al terminar")
+        return stopped
+
+    def set_fps(self, fps):
+        """Pedir otra frecuencia de captura; se aplica entre dos lecturas"""
+        if not self.running:
+            self._apply_fps(fps)
+            return
+        with self._cond:
+            self._pending_fps = fps
+
+    def _apply_fps(self, fps):
+        try:
+            supported = bool(self.cap.set(cv2.CAP_PROP_FPS, fps))
+        except Exception as e:
+            print(f"ERROR: Error cambiando FPS de captura: {e}")
+            supported = False
+
+        if not supported and self.fps_supported is not False:
+            print("INFO: El backend no acepta cambiar los FPS de captura")
+        self.fps_supported = supported
+
+    def read_latest(self, last_seq=0, timeout=1.0):
+        """Esperar un frame más nuevo que `last_seq` y devolverlo como FramePacket.
+
+        Devuelve None si vence el timeout, si la captura falló o si se detuvo.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._has_new_frame(last_seq) or self.failed
+                                or self._stop_event.is_set(), timeout)
+
+            if not self._has_new_frame(last_seq):
+                return None
+
+            slot = self._latest_slot
+            self._held_slot = slot
+            self._consumed_seq = self._seqs[slot]
+            return FramePacket(self._seqs[slot], self._timestamps[slot], self._ring[slot], slot)
+
+    def _has_new_frame(self, last_seq):
+        return self._latest_slot is not None and self._seqs[self._latest_slot] > last_seq
+
+    def _next_write_slot(self):
+        """Slot más viejo que no sea el último publicado ni el que tiene el consumidor"""
+        candidates = [slot for slot in range(self.ring_size)
+                      if slot != self._latest_slot and slot != self._held_slot]
+        return min(candidates, key=lambda slot: self._seqs[slot])
+
+    def _capture_loop(self):
+        """Bucle del hilo de captura"""
+        consecutive_errors = 0
+
+        try:
+            while not self._stop_event.is_set():
+                with self._cond:
+                    slot = self._next_write_slot()
+                    buffer = self._ring[slot]
+                    fps, self._pending_fps = self._pending_fps, None
+
+                # La cámara solo se toca desde este hilo
+                if fps is not None:
+                    self._apply_fps(fps)
+
+                ret, frame = self.cap.read(buffer) if buffer is not None else self.cap.read()
+                timestamp = time.time()
+
+                if not ret or frame is None:
+                    consecutive_errors += 1
+                    print(f"ERROR: Error leyendo frame ({consecutive_errors}/{self.max_errors})")
+
+                    if consecutive_errors >= self.max_errors:
+                        with self._cond:
+                            self.failed = True
+                            self._cond.notify_all()
+                        break
+
+                    time.sleep(0.1)
+                    continue
+
+                consecutive_errors = 0
+
+                with self._cond:
+                    # Si el backend cambió la resolución, read() devuelve un array nuevo
+                    self._ring[slot] = frame
+
+                    if self._latest_slot is not None and self._seqs[self._latest_slot] > self._consumed_seq:
+                        self.dropped_frames += 1
+
+                    self._seq += 1
+                    self._seqs[slot] = self._seq
+                    self._timestamps[slot] = timestamp
+                    self._latest_slot = slot
+                    self._cond.notify_all()
+
+        except Exception as e:
+            print(f"ERROR: Error en hilo de captura: {e}")
+            with self._cond:
+                self.failed = True
+                self._cond.notify_all()
+
+        finally:
+            self._release_capture()
+
+    def _release_capture(self):
+        try:
+            if self.cap is not None:
+                self.cap.release()
+        except Exception as e:
+            print(f"ERROR: Error liberando cámara: {e}")
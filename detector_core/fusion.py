@@ -0,0 +1,70 @@
+"""Evaluación perezosa de la lógica de fusión, en orden de costo medido"""
+import time
+
+
+class LazyFusion:
+    """Evalúa expresiones booleanas sobre detectores con corte temprano.
+
+    Una expresión es el nombre de una etapa o una tupla ('or' | 'and', *términos),
+    por ejemplo ('or', 'face', 'hands', ('and', 'shapes', 'motion')). Los
+    términos se evalúan del más barato al más caro según el costo medido
+    (promedio móvil en ms; lo que nunca se midió va primero) y en cuanto el
+    resultado queda decidido el resto se salta. Un término compuesto cuesta la
+    suma de sus etapas; saltarlo cuenta un salto para cada una.
+
+    Las etapas de `launched` (cuyas entradas ya se lanzaron en paralelo) no
+    ahorran nada al saltarse: se cuentan aparte, en `unused`, como
+    calculadas y no usadas.
+    """
+
+    def __init__(self, smoothing=0.2):
+        self.smoothing = smoothing
+        self.costs = {}
+        self.skips = {}
+        self.unused = {}
+        self.values = {}
+        self._launched = ()
+
+    def decide(self, expr, stages, launched=()):
+        """Evaluar `expr`; `stages` mapea cada nombre a una función sin argumentos"""
+        self.values = {}
+        self._launched = launched
+        return self._evaluate(expr, stages)
+
+    def cost(self, expr):
+        """Costo esperado en ms de evaluar `expr` completa"""
+        if isinstance(expr, str):
+            return self.costs.get(expr, 0.0)
+        return sum(self.cost(term) for term in expr[1:])
+
+    def _evaluate(self, expr, stages):
+        if isinstance(expr, str):
+            return self._run(expr, stages[expr])
+
+        op, terms = expr[0], sorted(expr[1:], key=self.cost)
+        decisive = op == 'or'
+        for i, term in enumerate(terms):
+            if self._evaluate(term, stages) == decisive:
+                for skipped in terms[i + 1:]:
+                    self._skip(skipped)
+                return decisive
+        return not decisive
+
+    def _run(self, name, stage):
+        start = time.perf_counter()
+        value = bool(stage())
+        elapsed = (time.perf_counter() - start) * 1000
+
+        previous = self.costs.get(name)
+        self.costs[name] = elapsed if previous is None else previous + self.smoothing * (elapsed - previous)
+        self.skips.setdefault(name, 0)
+        self.values[name] = value
+        return value
+
+    def _skip(self, expr):
+        if isinstance(expr, str):
+            counter = self.unused if expr in self._launched else self.skips
+            counter[expr] = counter.get(expr, 0) + 1
+            return
+        for term in expr[1:]:
+            self._skip(term)
@@ -0,0 +1,167 @@
+"""Métodos de detección como grafos de etapas con entradas declaradas"""
+import functools
+import threading
+import time
+from collections import namedtuple
+
+Stage = namedtuple('Stage', ['name', 'compute', 'inputs', 'lazy'])
+
+
+class DetectionGraph:
+    """Motor único para todos los métodos de detección.
+
+    Cada etapa declara sus entradas y se calcula como `compute(ctx, *entradas)`:
+    primero los valores de `inputs` y después, por cada nombre de `lazy`, una
+    función sin argumentos que evalúa esa etapa solo si se la llama (para
+    fusiones con corte temprano). Un método es el nombre de la etapa cuyo
+    valor decide la detección.
+
+    Los valores se memorizan en el FrameContext, así que una etapa compartida
+    por varias ramas corre una sola vez por frame. `timings` guarda el tiempo
+    propio de cada etapa (promedio móvil en ms, sin contar sus entradas).
+
+    Las etapas programadas en `schedule` (StageSchedule) corren a su propia
+    frecuencia; entre ejecuciones devuelven su último valor sin calcular
+    siquiera sus entradas. Las etapas marcadas con `sheddable` se descartan
+    si su tiempo medido no entra en el presupuesto del frame (FrameBudget):
+    devuelven su último valor programado o, si no hay, el valor de reemplazo.
+
+    Con un `executor` (concurrent.futures), al calcular una etapa declarada
+    con `concurrent` se lanzan en paralelo las etapas independientes que
+    indica; quien necesite una de ellas toma su valor (o espera a que
+    termine) desde el contexto, y la etapa no termina hasta que terminen
+    todas. Las que todavía no empezaron cuando ya no hacen falta se cancelan.
+    """
+
+    def __init__(self, default=None, smoothing=0.2, schedule=None, budget=None, executor=None):
+        self.default = default
+        self.smoothing = smoothing
+        self.schedule = schedule
+        self.budget = budget
+        self.executor = executor
+        self.fallbacks = {}
+        self.prefetch = {}
+        self.stages = {}
+        self.methods = {}
+        self.timings = {}
+        self._local = threading.local()
+
+    def add(self, name, compute, inputs=(), lazy=()):
+        """Registrar una etapa; sus entradas tienen que existir de antemano"""
+        for dependency in tuple(inputs) + tuple(lazy):
+            if dependency not in self.stages:
+                raise ValueError(f"Etapa '{name}': entrada desconocida '{dependency}'")
+        self.stages[name] = Stage(name, compute, tuple(inputs), tuple(lazy))
+
+    def method(self, name, output):
+        """Registrar un método de detección que devuelve el valor de `output`"""
+        if output not in self.stages:
+            raise ValueError(f"Método '{name}': etapa desconocida '{output}'")
+        self.methods[name] = output
+
+    def sheddable(self, name, fallback):
+        """Permitir descartar `name` por presupuesto, devolviendo `fallback`"""
+        if name not in self.stages:
+            raise ValueError(f"Etapa desconocida '{name}'")
+        self.fallbacks[name] = fallback
+
+    def concurrent(self, name, stages):
+        """Lanzar `stages` en paralelo (si hay executor) cada vez que se calcula `name`"""
+        for dependency in (name,) + tuple(stages):
+            if dependency not in self.stages:
+                raise ValueError(f"Etapa desconocida '{dependency}'")
+        self.prefetch[name] = tuple(stages)
+
+    def launched_with(self, name):
+        """Etapas cuyas entradas se lanzan todas en paralelo al calcular `name` (ninguna sin executor).
+
+        Saltarse una de ellas no ahorra el cálculo de sus entradas.
+        """
+        if self.executor is None or name not in self.prefetch:
+            return ()
+        launched = set(self.prefetch[name])
+        return tuple(other for other, stage in self.stages.items()
+                     if stage.inputs + stage.lazy and launched.issuperset(stage.inputs + stage.lazy))
+
+    def run(self, method, ctx):
+        """Valor de decisión del método (el predeterminado si no existe)"""
+        output = self.methods.get(method, self.methods.get(self.default))
+        if output is None:
+            return False
+        return self.evaluate(output, ctx)
+
+    def evaluate(self, name, ctx):
+        """Valor de una etapa en este frame, calculado a lo sumo una vez"""
+        start = time.perf_counter()
+        try:
+            return ctx.cached(('stage', name), lambda: self._evaluate(self.stages[name], ctx))
+        finally:
+            # Calcularla (o esperar a otro hilo que la calcula) no es tiempo propio de quien la pidió
+            nested = self._nested
+            if nested:
+                nested[-1] += time.perf_counter() - start
+
+    @property
+    def _nested(self):
+        """Pila de tiempos de entradas de las etapas en curso en este hilo"""
+        try:
+            return self._local.nested
+        except AttributeError:
+            nested = self._local.nested = []
+            return nested
+
+    def _evaluate(self, stage, ctx):
+        scheduled = self.schedule is not None and stage.name in self.schedule
+        if scheduled and self.schedule.reusable(stage.name, ctx):
+            return self._replay(stage, ctx)
+
+        if (stage.name in self.fallbacks and self.budget is not None
+                and not self.budget.allows(stage.name, self.timings.get(stage.name, 0.0))):
+            # Descartada: se posterga con el último valor, sin contarla como ejecución
+            if scheduled and self.schedule.has_value(stage.name):
+                return self._replay(stage, ctx)
+            return self.fallbacks[stage.name]
+
+        if not scheduled:
+            return self._compute(stage, ctx)
+
+        # Lo que escribe esta etapa (no las programadas que calcule adentro ni otros hilos)
+        with ctx.results.recording() as written:
+            value = self._compute(stage, ctx)
+        self.schedule.record(stage.name, ctx, value, written)
+        return value
+
+    def _replay(self, stage, ctx):
+        value, results = self.schedule.latest(stage.name)
+        ctx.results.update(results)
+        return value
+
+    def _compute(self, stage, ctx):
+        futures = self._submit(stage, ctx)
+        start = time.perf_counter()
+        nested = self._nested
+        nested.append(0.0)
+        try:
+            args = [self.evaluate(dependency, ctx) for dependency in stage.inputs]
+            args.extend(functools.partial(self.evaluate, dependency, ctx) for dependency in stage.lazy)
+            return stage.compute(ctx, *args)
+        finally:
+            own = (time.perf_counter() - start - nested.pop()) * 1000
+            previous = self.timings.get(stage.name)
+            self.timings[stage.name] = own if previous is None else previous + self.smoothing * (own - previous)
+            self._join(futures)
+
+    def _submit(self, stage, ctx):
+        """Lanzar en paralelo las etapas declaradas para `stage`; lista de (nombre, future)"""
+        if self.executor is None or stage.name not in self.prefetch:
+            return []
+        return [(name, self.executor.submit(self.evaluate, name, ctx)) for name in self.prefetch[stage.name]]
+
+    def _join(self, futures):
+        """Esperar las etapas lanzadas; las que no empezaron ya no hacen falta"""
+        for name, future in futures:
+            if future.cancel():
+                continue
+            error = future.exception()
+            if error is not None:
+                print(f"ERROR: Etapa '{name}' en paralelo: {error}")
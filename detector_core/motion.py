@@ -0,0 +1,165 @@
+"""Modelo de fondo incremental y máscara de movimiento compartida"""
+import cv2
+import numpy as np
+
+
+class MotionModel:
+    """Mantiene un modelo de fondo y produce una máscara binaria de primer plano.
+
+    Modos:
+    - 'running_average': promedio móvil con cv2.accumulateWeighted en un
+      buffer float32 preasignado; la máscara es |gris - fondo| > umbral.
+    - 'mog2': sustractor MOG2 de OpenCV.
+
+    Todos los buffers se reservan una vez por resolución y se reutilizan con
+    `dst=`. La máscara devuelta por `apply` es válida hasta la próxima llamada.
+
+    Sobre la máscara se construye (a demanda, una vez por frame) su imagen
+    integral, de modo que `region_fraction` responde cuánto movimiento hay en
+    cualquier rectángulo con cuatro lecturas, sin recorrer sus píxeles.
+    """
+
+    def __init__(self, mode='running_average', learning_rate=0.05, threshold=25,
+                 kernel_size=5, max_gap=1.0):
+        self.mode = mode
+        self.learning_rate = learning_rate
+        self.threshold = threshold
+        self.max_gap = max_gap
+        self.kernel = np.ones((kernel_size, kernel_size), np.uint8)
+        self.reset()
+
+    def reset(self):
+        """Descartar el fondo; el próximo frame lo reinicializa"""
+        self._shape = None
+        self._background = None
+        self._mog2 = None
+        self._last_timestamp = None
+        self._integral_valid = False
+        self.mask = None
+
+    @property
+    def ready(self):
+        """True cuando ya hay un fondo contra el cual comparar"""
+        return self.mask is not None
+
+    def _allocate(self, shape):
+        self._shape = shape
+        self._background = np.empty(shape, np.float32)
+        self._background_u8 = np.empty(shape, np.uint8)
+        self._diff = np.empty(shape, np.uint8)
+        self._scratch = np.empty(shape, np.uint8)
+        self._mask = np.zeros(shape, np.uint8)
+
+        # La suma de una máscara 0/255 desborda int32 por encima de ~8 Mpx
+        height, width = shape[:2]
+        self._integral_depth = cv2.CV_32S if height * width * 255 < 2 ** 31 else cv2.CV_64F
+        self._integral = np.empty((height + 1, width + 1),
+                                  np.int32 if self._integral_depth == cv2.CV_32S else np.float64)
+        self._integral_valid = False
+        if self.mode == 'mog2':
+            self._mog2 = cv2.createBackgroundSubtractorMOG2(history=200, varThreshold=16, detectShadows=False)
+
+    def apply(self, gray, timestamp=None):
+        """Actualizar el modelo con `gray` (ya suavizado) y devolver la máscara.
+
+        Devuelve None en el primer frame o tras un hueco mayor que `max_gap`
+        segundos, cuando el fondo se reinicializa con el frame actual.
+        """
+        stale = (timestamp is not None and self._last_timestamp is not None
+                 and timestamp - self._last_timestamp > self.max_gap)
+        self._last_timestamp = timestamp
+
+        if self._shape != gray.shape or stale:
+            self._allocate(gray.shape)
+            if self.mode == 'mog2':
+                self._mog2.apply(gray, self._mask, 1.0)
+            else:
+                self._background[:] = gray
+            self.mask = None
+            return None
+
+        if self.mode == 'mog2':
+            self._mog2.apply(gray, self._mask, self.learning_rate)
+        else:
+            cv2.convertScaleAbs(self._background, dst=self._background_u8)
+            cv2.absdiff(gray, self._background_u8, dst=self._diff)
+            cv2.threshold(self._diff, self.threshold, 255, cv2.THRESH_BINARY, dst=self._mask)
+            cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+
+        # Limpiar ruido: apertura y cierre in situ
+        cv2.morphologyEx(self._mask, cv2.MORPH_OPEN, self.kernel, dst=self._scratch)
+        cv2.morphologyEx(self._scratch, cv2.MORPH_CLOSE, self.kernel, dst=self._mask)
+
+        self.mask = self._mask
+        self._integral_valid = False
+        return self.mask
+
+    def integral(self):
+        """Imagen integral de la máscara actual (None sin máscara)"""
+        if self.mask is None:
+            return None
+        if not self._integral_valid:
+            cv2.integral(self.mask, self._integral, sdepth=self._integral_depth)
+            self._integral_valid = True
+        return self._integral
+
+    def region_fraction(self, x, y, w, h):
+        """Fracción de píxeles en movimiento del rectángulo, en O(1)"""
+        integral = self.integral()
+        if integral is None:
+            return None
+
+        height, width = self.mask.shape[:2]
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(width, x + w), min(height, y + h)
+        if x1 <= x0 or y1 <= y0:
+            return None
+
+        total = integral[y1, x1] - integral[y0, x1] - integral[y1, x0] + integral[y0, x0]
+        return float(total) / (255.0 * (x1 - x0) * (y1 - y0))
+
+    def dirty_rectangles(self, padding=24, min_area=150):
+        """Cajas (x, y, w, h) de las zonas en movimiento, ampliadas y fusionadas.
+
+        Cada componente conexo de la máscara con al menos `min_area` píxeles
+        aporta su caja agrandada `padding` píxeles por lado (recortada al
+        frame); las cajas que se tocan se fusionan hasta que no quede ninguna
+        superpuesta. Devuelve None si todavía no hay máscara.
+        """
+        if self.mask is None:
+            return None
+
+        height, width = self.mask.shape[:2]
+        _, _, stats, _ = cv2.connectedComponentsWithStats(self.mask, connectivity=8)
+
+        boxes = []
+        for x, y, w, h, area in stats[1:]:
+            if area < min_area:
+                continue
+            x0, y0 = max(0, x - padding), max(0, y - padding)
+            x1, y1 = min(width, x + w + padding), min(height, y + h + padding)
+            boxes.append((x0, y0, x1 - x0, y1 - y0))
+
+        return merge_rectangles(boxes)
+
+
+def merge_rectangles(boxes):
+    """Fusionar cajas (x, y, w, h) superpuestas o adyacentes hasta que no quede ninguna"""
+    boxes = [tuple(int(v) for v in box) for box in boxes]
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            x, y, w, h = box
+            for i, (ox, oy, ow, oh) in enumerate(result):
+                if x <= ox + ow and ox <= x + w and y <= oy + oh and oy <= y + h:
+                    x0, y0 = min(x, ox), min(y, oy)
+                    x1, y1 = max(x + w, ox + ow), max(y + h, oy + oh)
+                    result[i] = (x0, y0, x1 - x0, y1 - y0)
+                    merged = True
+                    break
+            else:
+                result.append(box)
+        boxes = result
+    return boxes
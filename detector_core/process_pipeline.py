@@ -0,0 +1,346 @@
+"""Detección en procesos aparte con los frames en memoria compartida"""
+import functools
+import multiprocessing
+import queue
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+# Distribución de procesos elegible al iniciar:
+# - 'inline': todo en el proceso de la GUI (hilos, como siempre)
+# - 'worker': la detección en un proceso; la GUI solo captura, alerta y muestra
+# - 'split': además, las etapas que el detector indica en PROCESS_SPLIT
+#   corren en un segundo proceso, en paralelo con el resto del grafo
+PROCESS_LAYOUTS = ('inline', 'worker', 'split')
+
+# Resultado de un frame que vuelve a la GUI: solo datos chicos, nunca píxeles.
+# `slot` es dónde está el frame en el anillo compartido y `scale` el factor
+# de las coordenadas de `results` a las del frame
+FrameRecord = namedtuple('FrameRecord', ['seq', 'timestamp', 'slot', 'detected', 'results', 'data', 'scale'])
+
+
+class SharedFrameRing:
+    """Slots de frames en un bloque de multiprocessing.shared_memory.
+
+    El proceso que lo crea (sin `name`) es su dueño y lo libera al cerrar;
+    los demás se conectan con el nombre. En todos, cada slot es un array
+    numpy que apunta a la misma memoria, así que los píxeles nunca se
+    copian entre procesos ni se serializan.
+    """
+
+    def __init__(self, shape, slots=3, name=None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.owner = name is None
+
+        size = int(np.prod(self.shape)) * slots
+        self._memory = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        self.name = self._memory.name
+        self._frames = np.ndarray((slots,) + self.shape, np.uint8, buffer=self._memory.buf)
+        self._next = 0
+
+    def view(self, slot):
+        return self._frames[slot]
+
+    def next_slot(self):
+        """(índice, vista) del próximo slot, en ronda"""
+        slot = self._next
+        self._next = (slot + 1) % self.slots
+        return slot, self._frames[slot]
+
+    def close(self):
+        """Desconectarse (y liberar el bloque si es el dueño)"""
+        self._frames = None
+        try:
+            self._memory.close()
+            if self.owner:
+                self._memory.unlink()
+        except (BufferError, FileNotFoundError) as e:
+            print(f"WARNING: Memoria compartida de frames: {e}")
+
+
+class ProcessPipeline:
+    """Corre un detector en procesos aparte, frame a frame.
+
+    `factory(config)` crea en cada proceso un detector sin ventana, que debe
+    ofrecer `apply_settings(settings)`, `begin_frame()`,
+    `frame_context(frame, seq, timestamp)`, `analyze_frame(ctx, method)`,
+    `detection_graph` y `detection_data`.
+
+    La GUI escribe cada frame (espejado) en un slot del anillo compartido y
+    manda solo el número de slot, el método y los cambios de configuración;
+    el proceso de detección devuelve un FrameRecord. Hay un frame en análisis
+    por vez: con 3 slots, mientras se analiza uno se puede mostrar el
+    anterior y escribir el siguiente sin pisar nada.
+
+    Con `split` (etapas sin entradas del grafo), un segundo proceso calcula
+    esas etapas sobre el mismo slot y el de detección toma sus valores en
+    vez de calcularlas; cada frame espera a los dos procesos, así que su
+    latencia es la del más lento y no la suma.
+    """
+
+    def __init__(self, factory, config, shape, split=(), slots=3, timeout=2.0, start_timeout=60.0):
+        self.factory = factory
+        self.config = dict(config)
+        self.shape = tuple(shape)
+        self.split = tuple(split)
+        self.slots = slots
+        self.timeout = timeout
+        self.start_timeout = start_timeout
+
+        self.ring = None
+        self._processes = []
+        self._tasks = None
+        self._split_tasks = None
+        self._results = None
+        self._sent = {}
+
+    @property
+    def alive(self):
+        return bool(self._processes) and all(process.is_alive() for process in self._processes)
+
+    def start(self):
+        """Crear el anillo y los procesos; False si no llegaron a estar listos"""
+        context = multiprocessing.get_context('spawn')
+        self.ring = SharedFrameRing(self.shape, self.slots)
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        self._sent = dict(self.config)
+
+        args = (self.factory, self.config, self.ring.name, self.shape, self.slots)
+        split_results = None
+        if self.split:
+            self._split_tasks = context.Queue()
+            split_results = context.Queue()
+            self._processes.append(context.Process(
+                target=_split_worker, args=args + (self.split, self._split_tasks, split_results),
+                name="DetectionSplit", daemon=True))
+        self._processes.insert(0, context.Process(
+            target=_detection_worker, args=args + (self.split, self.timeout, self.start_timeout,
+                                                   self._tasks, self._results, split_results),
+            name="Detection", daemon=True))
+
+        for process in self._processes:
+            process.start()
+
+        ready = None
+        deadline = time.monotonic() + self.start_timeout
+        while ready is None and time.monotonic() < deadline:
+            try:
+                ready = self._results.get(timeout=0.5)
+            except queue.Empty:
+                # Un proceso que murió al arrancar no va a responder: no esperar el plazo entero
+                if not self.alive:
+                    break
+        if ready != 'ready':
+            print("ERROR: Los procesos de detección no arrancaron")
+            self.stop()
+            return False
+
+        print(f"OK: Detección en {len(self._processes)} proceso(s)"
+              + (f" ({', '.join(self.split)} aparte)" if self.split else ""))
+        return True
+
+    def submit(self, frame, seq, timestamp, method, config, mirror=True):
+        """Escribir `frame` en el próximo slot (espejado) y pedir su análisis"""
+        if frame.shape != self.shape:
+            print(f"ERROR: Frame de {frame.shape} en un anillo de {self.shape}")
+            return False
+
+        slot, view = self.ring.next_slot()
+        if mirror:
+            cv2.flip(frame, 1, dst=view)
+        else:
+            np.copyto(view, frame)
+
+        # Solo viaja lo que cambió de la configuración desde el último frame
+        settings = {key: value for key, value in config.items() if self._sent.get(key, _MISSING) != value}
+        self._sent.update(settings)
+
+        task = (slot, seq, timestamp, method, settings)
+        self._tasks.put(task)
+        if self._split_tasks is not None:
+            self._split_tasks.put(task)
+        return True
+
+    def wait_result(self, running, timeout=1.0):
+        """Esperar el FrameRecord pedido; None si `running()` deja de ser cierto o un proceso murió"""
+        while running() and self.alive:
+            try:
+                return self._results.get(timeout=timeout)
+            except queue.Empty:
+                continue
+        return None
+
+    def view(self, slot):
+        return self.ring.view(slot)
+
+    def stop(self, timeout=2.0):
+        """Terminar los procesos y liberar la memoria compartida"""
+        for tasks in (self._tasks, self._split_tasks):
+            if tasks is not None:
+                tasks.put(None)
+
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                print(f"WARNING: El proceso {process.name} no terminó; se fuerza")
+                process.terminate()
+        self._processes = []
+        self._tasks = self._split_tasks = self._results = None
+
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+
+_MISSING = object()
+
+
+class _SplitValues:
+    """Valores que calcula el proceso auxiliar, tomados por número de frame"""
+
+    def __init__(self, results, timeout, fallbacks):
+        self.results = results
+        self.timeout = timeout
+        self.fallbacks = fallbacks
+        self._record = None
+
+    def _get(self, seq):
+        deadline = time.monotonic() + self.timeout
+        while self._record is None or self._record[0] < seq:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                self._record = self.results.get(timeout=remaining)
+            except queue.Empty:
+                return None
+        return self._record if self._record[0] == seq else None
+
+    def value(self, name, ctx):
+        """Compute de la etapa `name` en el proceso de detección"""
+        record = self._get(ctx.seq)
+        if record is None:
+            print(f"ERROR: Sin respuesta del proceso auxiliar para '{name}'")
+            return self.fallbacks.get(name)
+
+        _, values, results = record
+        ctx.results.update(results)
+        return values.get(name, self.fallbacks.get(name))
+
+    def finish(self, seq):
+        """Esperar al auxiliar aunque no se haya usado su valor: así el slot queda libre"""
+        self._get(seq)
+
+
+def _reachable(graph, method, split):
+    """Etapas de `split` que el método puede llegar a pedir (por entradas o perezosas)"""
+    pending = [graph.methods.get(method, graph.methods.get(graph.default))]
+    seen = set()
+    while pending:
+        name = pending.pop()
+        if name is None or name in seen:
+            continue
+        seen.add(name)
+        stage = graph.stages[name]
+        pending.extend(stage.inputs + stage.lazy)
+    return tuple(name for name in split if name in seen)
+
+
+def _attach(factory, config, ring_name, shape, slots):
+    return SharedFrameRing(shape, slots, name=ring_name), factory(config)
+
+
+def _frame_context(detector, ring, task):
+    slot, seq, timestamp, method, settings = task
+    if settings:
+        detector.apply_settings(settings)
+    detector.begin_frame()
+    return detector.frame_context(ring.view(slot), seq, timestamp)
+
+
+def _detection_worker(factory, config, ring_name, shape, slots, split, timeout, start_timeout,
+                      tasks, results, split_results):
+    """Proceso de detección: el grafo completo, con las etapas de `split` tomadas del auxiliar"""
+    ring, detector = _attach(factory, config, ring_name, shape, slots)
+    graph = detector.detection_graph
+
+    split_values = None
+    if split:
+        split_values = _SplitValues(split_results, timeout, graph.fallbacks)
+        for name in split:
+            stage = graph.stages[name]
+            if stage.inputs or stage.lazy:
+                raise ValueError(f"La etapa '{name}' tiene entradas; no puede correr en otro proceso")
+            graph.stages[name] = stage._replace(compute=functools.partial(split_values.value, name))
+        try:
+            split_ready = split_results.get(timeout=start_timeout)
+        except queue.Empty:
+            split_ready = None
+        if split_ready != 'ready':
+            print("ERROR: El proceso auxiliar no arrancó")
+            results.put('failed')
+            ring.close()
+            return
+
+    results.put('ready')
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            ctx = _frame_context(detector, ring, task)
+            try:
+                detected = detector.analyze_frame(ctx, task[3])
+            except Exception as e:
+                print(f"ERROR: Proceso de detección: {e}")
+                detected = False
+            if split_values is not None:
+                split_values.finish(ctx.seq)
+
+            results.put(FrameRecord(ctx.seq, ctx.timestamp, task[0], detected, dict(ctx.results),
+                                    dict(detector.detection_data), ctx.source_scale))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ctx = None
+        ring.close()
+
+
+def _split_worker(factory, config, ring_name, shape, slots, split, tasks, split_results):
+    """Proceso auxiliar: solo las etapas de `split`, con su propia programación"""
+    ring, detector = _attach(factory, config, ring_name, shape, slots)
+    graph = detector.detection_graph
+    needed = {}
+
+    split_results.put('ready')
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+
+            ctx = _frame_context(detector, ring, task)
+            method = task[3]
+            if method not in needed:
+                needed[method] = _reachable(graph, method, split)
+
+            # Las que el método no usa no se calculan; el de detección no espera nada caro
+            values = {}
+            for name in needed[method]:
+                try:
+                    values[name] = graph.evaluate(name, ctx)
+                except Exception as e:
+                    print(f"ERROR: Proceso auxiliar, etapa '{name}': {e}")
+                    values[name] = graph.fallbacks.get(name)
+            split_results.put((ctx.seq, values, dict(ctx.results)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ctx = None
+        ring.close()
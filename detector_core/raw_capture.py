@@ -0,0 +1,103 @@
+"""Captura cruda (YUYV / MJPEG) con gris directo y color solo bajo demanda"""
+import cv2
+import numpy as np
+
+from .cameras import fourcc_name
+
+# Decodificación JPEG reducida: factor -> (flag gris, flag color)
+_REDUCED_FLAGS = {
+    1: (cv2.IMREAD_GRAYSCALE, cv2.IMREAD_COLOR),
+    2: (cv2.IMREAD_REDUCED_GRAYSCALE_2, cv2.IMREAD_REDUCED_COLOR_2),
+    4: (cv2.IMREAD_REDUCED_GRAYSCALE_4, cv2.IMREAD_REDUCED_COLOR_4),
+    8: (cv2.IMREAD_REDUCED_GRAYSCALE_8, cv2.IMREAD_REDUCED_COLOR_8),
+}
+
+
+class RawDecoder:
+    """Convierte los buffers crudos de la cámara en gris y, si hace falta, en BGR.
+
+    - YUYV: el plano Y se toma como vista del buffer (bytes pares); la única
+      copia es la del espejado, que el bucle ya hacía sobre el BGR completo.
+    - MJPEG: el JPEG se decodifica directo a gris, reducido por el mayor
+      factor (1, 2, 4, 8) que deja el ancho en al menos `target_width`.
+
+    El BGR (`color`) solo se produce cuando alguien lo pide, por ejemplo
+    para mostrar la cámara.
+    """
+
+    def __init__(self, fourcc, width, height, target_width=None, mirror=True):
+        if fourcc not in ('YUYV', 'MJPG'):
+            raise ValueError(f"Formato crudo no soportado: {fourcc}")
+        self.fourcc = fourcc
+        self.width = width
+        self.height = height
+        self.mirror = mirror
+
+        self.reduction = 1
+        if fourcc == 'MJPG' and target_width:
+            while self.reduction < 8 and width // (self.reduction * 2) >= target_width:
+                self.reduction *= 2
+
+    @classmethod
+    def open(cls, cap, fourcc='YUYV', target_width=None, mirror=True):
+        """Pasar la cámara a modo crudo; None (y la cámara como estaba) si no lo soporta"""
+        try:
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+            if not cap.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+                raise RuntimeError("el backend no permite desactivar CONVERT_RGB")
+
+            actual = fourcc_name(cap.get(cv2.CAP_PROP_FOURCC))
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            decoder = cls(actual, width, height, target_width, mirror)
+
+            ret, raw = cap.read()
+            if not ret or decoder.gray(raw) is None:
+                raise RuntimeError("el primer frame crudo no se pudo interpretar")
+
+            print(f"OK: Captura cruda {actual} {width}x{height} (reducción {decoder.reduction})")
+            return decoder
+        except Exception as e:
+            print(f"INFO: Captura cruda no disponible ({e}); se usa BGR")
+            cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            return None
+
+    def gray(self, raw, buffers=None):
+        """Gris (espejado si corresponde) del buffer crudo; None si no tiene el tamaño esperado.
+
+        Con `buffers` (FrameBuffers) el gris se escribe en su buffer 'raw_gray'.
+        """
+        if self.fourcc == 'YUYV':
+            if raw.size != self.width * self.height * 2:
+                return None
+            rows = raw.reshape(self.height, self.width * 2)
+            # Vista del plano Y; el espejado la recorre al revés y hace la copia contigua
+            y_plane = rows[:, self.width * 2 - 2::-2] if self.mirror else rows[:, ::2]
+            dst = buffers.get('raw_gray', y_plane.shape) if buffers is not None else None
+            if dst is None:
+                return np.ascontiguousarray(y_plane)
+            np.copyto(dst, y_plane)
+            return dst
+
+        gray = cv2.imdecode(raw.reshape(-1), _REDUCED_FLAGS[self.reduction][0])
+        if gray is None or not self.mirror:
+            return gray
+        return cv2.flip(gray, 1, dst=buffers.like('raw_gray', gray) if buffers is not None else None)
+
+    def color(self, raw, size=None, buffers=None):
+        """BGR del buffer crudo, espejado y llevado a `size` (ancho, alto) si se indica"""
+        def out(name, shape):
+            return buffers.get(name, shape) if buffers is not None else None
+
+        if self.fourcc == 'YUYV':
+            frame = cv2.cvtColor(raw.reshape(self.height, self.width, 2), cv2.COLOR_YUV2BGR_YUYV,
+                                 dst=out('raw_color', (self.height, self.width, 3)))
+        else:
+            frame = cv2.imdecode(raw.reshape(-1), _REDUCED_FLAGS[self.reduction][1])
+
+        if self.mirror:
+            frame = cv2.flip(frame, 1, dst=out('raw_mirror', frame.shape))
+        if size is not None and (frame.shape[1], frame.shape[0]) != tuple(size):
+            frame = cv2.resize(frame, tuple(size), dst=out('raw_resized', (size[1], size[0], 3)),
+                               interpolation=cv2.INTER_AREA)
+        return frame
@@ -0,0 +1,96 @@
+"""Escala de procesamiento ajustada al tiempo medido por frame"""
+import statistics
+from collections import deque
+
+import cv2
+
+
+class ResolutionScaler:
+    """Elige a qué escala del frame corren los detectores.
+
+    Con el tiempo por frame (mediana de los últimos `hold_frames`) sobre
+    `target_ms` baja un escalón de `scales`; si el costo estimado en el
+    escalón de arriba (el actual por la razón de áreas) entra con margen en
+    `headroom` veces el objetivo, sube. Tras cada cambio espera `hold_frames` frames midiendo
+    de cero, para que un pico aislado no haga oscilar la escala.
+
+    Los primeros `warmup_frames` tras un cambio (búsqueda completa de
+    rostros, fondo y seguimiento reiniciados) cuestan varias veces lo
+    normal y no se miden. La mediana, a diferencia de un promedio móvil,
+    no se mueve por un frame aislado de 200 ms (la búsqueda completa
+    periódica de rostros): solo una carga sostenida cambia la escala.
+
+    Los umbrales en píxeles de la configuración valen a escala 1.0: `length`
+    convierte distancias, `area` superficies y `size` tamaños (ancho, alto).
+    Con `reference_width`, la escala 1.0 es ese ancho y no el de la captura,
+    así una cámara de mayor resolución no cambia el significado de los umbrales.
+    """
+
+    def __init__(self, scales=(1.0, 0.75, 0.5), target_ms=30.0, headroom=0.8, hold_frames=20,
+                 reference_width=None, warmup_frames=3):
+        self.scales = tuple(sorted(scales, reverse=True))
+        self.reference_width = reference_width
+        self.target_ms = target_ms
+        self.headroom = headroom
+        self.hold_frames = hold_frames
+        self.warmup_frames = warmup_frames
+        self._samples = deque(maxlen=hold_frames)
+        self.reset()
+
+    def reset(self):
+        """Volver a la escala completa"""
+        self.index = 0
+        self.frame_ms = None
+        self._frames = 0
+        self._samples.clear()
+
+    @property
+    def scale(self):
+        return self.scales[self.index]
+
+    def update(self, frame_ms):
+        """Registrar el tiempo de un frame; True si la escala cambió"""
+        self._frames += 1
+        if self._frames <= self.warmup_frames:
+            return False
+        self._samples.append(frame_ms)
+        self.frame_ms = statistics.median(self._samples)
+        if len(self._samples) < self.hold_frames:
+            return False
+
+        if self.frame_ms > self.target_ms and self.index + 1 < len(self.scales):
+            return self._step(1)
+        if self.index > 0:
+            ratio = (self.scales[self.index - 1] / self.scale) ** 2
+            if self.frame_ms * ratio < self.headroom * self.target_ms:
+                return self._step(-1)
+        return False
+
+    def _step(self, delta):
+        self.index += delta
+        self.frame_ms = None
+        self._frames = 0
+        self._samples.clear()
+        return True
+
+    def resize(self, frame, buffers=None):
+        """Frame a la escala de procesamiento (el mismo si ya tiene ese tamaño).
+
+        Con `buffers` (FrameBuffers) el resultado se escribe en su buffer 'processing'.
+        """
+        height, width = frame.shape[:2]
+        target = int(round((self.reference_width or width) * self.scale))
+        if target >= width:
+            return frame
+        target_height = int(round(height * target / float(width)))
+        dst = buffers.get('processing', (target_height, target) + frame.shape[2:]) if buffers is not None else None
+        return cv2.resize(frame, (target, target_height), dst=dst, interpolation=cv2.INTER_AREA)
+
+    def length(self, value):
+        return value * self.scale
+
+    def area(self, value):
+        return value * self.scale * self.scale
+
+    def size(self, value):
+        return tuple(max(1, int(round(v * self.scale))) for v in value)
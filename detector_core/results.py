@@ -0,0 +1,32 @@
+"""Resultados estructurados de detección"""
+from collections import namedtuple
+
+
+class Detection(namedtuple('Detection', ['x', 'y', 'w', 'h', 'score', 'label'])):
+    """Caja detectada en coordenadas del frame, con puntaje y etiqueta"""
+    __slots__ = ()
+
+    @property
+    def center(self):
+        return (self.x + self.w // 2, self.y + self.h // 2)
+
+    @property
+    def area(self):
+        return self.w * self.h
+
+    @property
+    def aspect_ratio(self):
+        return max(self.w, self.h) / max(1, min(self.w, self.h))
+
+
+def faces_to_detections(faces, label='ROSTRO'):
+    """Convertir la salida de detectMultiScale en una lista de Detection"""
+    return [Detection(int(x), int(y), int(w), int(h), 1.0, label) for (x, y, w, h) in faces]
+
+
+def scale_detections(detections, factor):
+    """Detecciones con las cajas multiplicadas por `factor` (de una escala a otra)"""
+    if factor == 1.0:
+        return list(detections)
+    return [d._replace(x=int(round(d.x * factor)), y=int(round(d.y * factor)),
+                       w=int(round(d.w * factor)), h=int(round(d.h * factor))) for d in detections]
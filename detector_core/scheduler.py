@@ -0,0 +1,101 @@
+"""Frecuencias propias por etapa: cada detector corre a su ritmo"""
+
+
+class _Slot:
+    def __init__(self, period, max_staleness):
+        self.period = period
+        self.max_staleness = max_staleness
+        self.last_time = None
+        self.due = None
+        self.value = None
+        self.results = {}
+        self.interval = None
+
+
+class StageSchedule:
+    """Limita cuántas veces por segundo se recalcula cada etapa programada.
+
+    Una etapa con frecuencia `rate` Hz reutiliza su último valor hasta su
+    próximo turno, que avanza de a 1 / rate segundos sobre una grilla fija
+    (así la frecuencia media no se redondea hacia abajo al período de los
+    frames). Ya vencida, puede postergarse un frame más si otra etapa
+    programada acaba de correr en ese mismo frame (para no apilar los
+    detectores caros en un frame), siempre que el valor no supere
+    `max_staleness` segundos; con `max_staleness` igual al período nunca se
+    posterga. Junto al valor se guardan los resultados que la etapa dejó en
+    `ctx.results`, así los overlays siguen dibujándolos.
+    """
+
+    def __init__(self, smoothing=0.2):
+        self.smoothing = smoothing
+        self._slots = {}
+
+    def __contains__(self, name):
+        return name in self._slots
+
+    def set_rate(self, name, rate, max_staleness=None):
+        """Programar `name` a `rate` Hz; rate None o 0 la devuelve a cada frame"""
+        if not rate:
+            self._slots.pop(name, None)
+            return
+        period = 1.0 / rate
+        max_staleness = max(period, max_staleness if max_staleness is not None else 2 * period)
+        slot = self._slots.get(name)
+        if slot is None:
+            self._slots[name] = _Slot(period, max_staleness)
+        else:
+            slot.period, slot.max_staleness = period, max_staleness
+
+    def reset(self):
+        """Olvidar los últimos valores (al reiniciar el monitoreo)"""
+        for slot in self._slots.values():
+            slot.last_time = None
+            slot.due = None
+            slot.value = None
+            slot.results = {}
+            slot.interval = None
+
+    def reusable(self, name, ctx):
+        """True si la etapa puede devolver su último valor en este frame"""
+        slot = self._slots[name]
+        if slot.last_time is None:
+            return False
+
+        if ctx.timestamp < slot.due:
+            return True
+        runs = ctx.cached('scheduled_runs', lambda: [0])
+        return (runs[0] > 0 and slot.max_staleness > slot.period
+                and ctx.timestamp - slot.last_time < slot.max_staleness)
+
+    def has_value(self, name):
+        """True si la etapa ya corrió al menos una vez"""
+        return self._slots[name].last_time is not None
+
+    def latest(self, name):
+        """(valor, resultados) de la última ejecución"""
+        slot = self._slots[name]
+        return slot.value, slot.results
+
+    def record(self, name, ctx, value, results):
+        """Guardar una ejecución nueva de la etapa"""
+        slot = self._slots[name]
+        ctx.cached('scheduled_runs', lambda: [0])[0] += 1
+
+        if slot.last_time is not None:
+            interval = ctx.timestamp - slot.last_time
+            if interval > 0:
+                slot.interval = interval if slot.interval is None else (
+                    slot.interval + self.smoothing * (interval - slot.interval))
+
+        # Si la etapa quedó más de un período atrasada, la grilla se reinicia
+        if slot.due is not None and ctx.timestamp - slot.due < slot.period:
+            slot.due += slot.period
+        else:
+            slot.due = ctx.timestamp + slot.period
+        slot.last_time = ctx.timestamp
+        slot.value = value
+        slot.results = results
+
+    def rates(self):
+        """Frecuencia efectiva (Hz) de cada etapa programada"""
+        return {name: 1.0 / slot.interval if slot.interval else 0.0 for name, slot in self._slots.items()}
@@ -0,0 +1,164 @@
+"""Extracción de candidatos a celular a partir de contornos"""
+import cv2
+import numpy as np
+
+from .results import Detection
+
+# Elemento estructurante del cierre de bordes
+_CLOSE_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+
+# Candidato compacto: caja, área del contorno, solidez y proporción
+PHONE_CANDIDATE_DTYPE = np.dtype([
+    ('x', np.int32), ('y', np.int32), ('w', np.int32), ('h', np.int32),
+    ('area', np.float64), ('solidity', np.float64), ('aspect_ratio', np.float64),
+])
+
+
+def find_phone_candidates(contours, min_area, max_area, min_solidity=0.0,
+                          min_aspect=1.2, max_aspect=3.5):
+    """Filtrar contornos con forma de celular; devuelve un array PHONE_CANDIDATE_DTYPE.
+
+    Por contorno, del filtro más barato al más caro: área, proporción de la
+    caja, solidez (casco convexo) y vértices de la aproximación poligonal.
+    Con pocos contornos por frame (o casi todos chicos) un prefiltro en
+    bloque con numpy resultó más lento que este bucle en
+    benchmark_phone_candidates.py.
+    """
+    rows = []
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area < min_area or area > max_area:
+            continue
+
+        x, y, w, h = cv2.boundingRect(contour)
+        aspect = max(w, h) / min(w, h)
+        if aspect < min_aspect or aspect > max_aspect:
+            continue
+
+        solidity = 1.0
+        if min_solidity > 0:
+            hull_area = cv2.contourArea(cv2.convexHull(contour))
+            if hull_area == 0:
+                continue
+            solidity = area / hull_area
+            if solidity < min_solidity:
+                continue
+
+        epsilon = 0.02 * cv2.arcLength(contour, True)
+        if len(cv2.approxPolyDP(contour, epsilon, True)) < 4:
+            continue
+
+        rows.append((x, y, w, h, area, solidity, aspect))
+
+    return np.array(rows, dtype=PHONE_CANDIDATE_DTYPE)
+
+
+def shape_edges(gray, canny_low, canny_high, block_size=11, buffers=None):
+    """Mapa de bordes para buscar formas: umbral adaptativo + Canny, cerrado.
+
+    Con `buffers` (FrameBuffers) los intermedios y el resultado van a buffers preasignados.
+    """
+    def out(name):
+        return buffers.get(name, gray.shape) if buffers is not None else None
+
+    edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, block_size, 2,
+                                  dst=out('shape_threshold'))
+    canny = cv2.Canny(gray, canny_low, canny_high, edges=out('shape_canny'))
+    cv2.bitwise_or(edges, canny, dst=edges)
+    return cv2.morphologyEx(edges, cv2.MORPH_CLOSE, _CLOSE_KERNEL, dst=out('shape_edges'))
+
+
+def extract_phone_candidates(ctx, min_area, max_area, min_solidity, canny_low, canny_high,
+                             mode='full', fast_scale=0.5, regions=None):
+    """Candidatos a celular del frame en coordenadas de resolución completa.
+
+    - 'full': filtro bilateral 9x9 sobre el gris completo.
+    - 'fast': gris reducido por `fast_scale` con un bilateral 5x5; las áreas
+      límite se escalan con la imagen y las cajas se devuelven reescaladas.
+      Encuentra menos candidatos que 'full' (ver benchmark_shape_preprocessing.py).
+
+    Con `regions` (cajas x, y, w, h sin superponerse) solo se filtran y
+    analizan esos recortes; los contornos vuelven desplazados a coordenadas
+    del frame.
+    """
+    scale = fast_scale if mode == 'fast' else 1.0
+    diameter = 5 if mode == 'fast' else 9
+    # El bloque adaptativo no se achica: con 5 px a media escala, el borde oscuro que separa
+    # al celular del fondo queda de 1-2 px y el cierre 3x3 lo tapa (el contorno se pierde)
+    block_size = max(11, int(11 * scale) | 1)
+
+    if regions is None:
+        gray = ctx.scaled_bilateral(scale, diameter) if mode == 'fast' else ctx.bilateral
+        edges = shape_edges(gray, canny_low, canny_high, block_size, ctx.buffers)
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    else:
+        contours = region_contours(ctx.scaled_gray(scale), regions, scale, diameter, block_size,
+                                   canny_low, canny_high)
+
+    area_scale = scale * scale
+    candidates = find_phone_candidates(contours, min_area * area_scale, max_area * area_scale, min_solidity)
+    return rescale_candidates(candidates, scale)
+
+
+def foveal_phone_candidates(ctx, regions, min_area, max_area, min_solidity, canny_low, canny_high):
+    """Candidatos buscados a la resolución de captura (`ctx.source`) dentro de `regions`.
+
+    Regiones, áreas límite y cajas devueltas están en coordenadas de
+    `ctx.frame`; solo el análisis de cada recorte ocurre a resolución
+    completa, con el filtro y el bloque adaptativo escalados a ella.
+    """
+    scale = ctx.source_scale
+    block_size = max(3, int(11 * scale) | 1)
+    contours = region_contours(ctx.source, regions, scale, 9, block_size, canny_low, canny_high)
+
+    area_scale = scale * scale
+    candidates = find_phone_candidates(contours, min_area * area_scale, max_area * area_scale, min_solidity)
+    return rescale_candidates(candidates, scale)
+
+
+def region_contours(image, regions, scale, diameter, block_size, canny_low, canny_high):
+    """Contornos externos de los recortes `regions` (en coordenadas / `scale`) de `image`.
+
+    Cada recorte es una vista de `image`; si es BGR se convierte a gris solo
+    el recorte. Los contornos vuelven en coordenadas de `image` y se
+    descartan los que tocan un borde interior del recorte.
+    """
+    height, width = image.shape[:2]
+    contours = []
+    for x, y, w, h in regions:
+        x0, y0 = int(x * scale), int(y * scale)
+        x1, y1 = min(width, int(round((x + w) * scale))), min(height, int(round((y + h) * scale)))
+        if x1 - x0 < block_size or y1 - y0 < block_size:
+            continue
+        crop = image[y0:y1, x0:x1]
+        if crop.ndim == 3:
+            crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        gray = cv2.bilateralFilter(crop, diameter, 75, 75)
+        edges = shape_edges(gray, canny_low, canny_high, block_size)
+        found, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x0, y0))
+        if not found:
+            continue
+
+        # Lo que toca un borde interior del recorte está cortado (o es el recorte mismo)
+        bx, by, bw, bh = np.array([cv2.boundingRect(contour) for contour in found]).T
+        clipped = (((bx <= x0) & (x0 > 0)) | ((by <= y0) & (y0 > 0))
+                   | ((bx + bw >= x1) & (x1 < width)) | ((by + bh >= y1) & (y1 < height)))
+        contours.extend(found[i] for i in np.flatnonzero(~clipped))
+    return contours
+
+
+def rescale_candidates(candidates, scale):
+    """Llevar candidatos detectados a escala `scale` de vuelta a resolución completa"""
+    if scale == 1.0 or len(candidates) == 0:
+        return candidates
+    rescaled = candidates.copy()
+    for field in ('x', 'y', 'w', 'h'):
+        rescaled[field] = np.round(candidates[field] / scale)
+    rescaled['area'] = candidates['area'] / (scale * scale)
+    return rescaled
+
+
+def candidates_to_detections(candidates, label='CELULAR', score='solidity'):
+    """Convertir candidatos a Detection para los overlays; `score` es el campo usado como puntaje"""
+    return [Detection(int(c['x']), int(c['y']), int(c['w']), int(c['h']), float(c[score]), label)
+            for c in candidates]
@@ -0,0 +1,61 @@
+"""Compuerta barata que detecta frames sin cambios"""
+import cv2
+import numpy as np
+
+
+class StaticGate:
+    """Compara una miniatura del frame contra la del último frame analizado.
+
+    Un píxel de la miniatura cambió si difiere en más de `pixel_threshold`
+    niveles de gris; si cambió a lo sumo una fracción `max_changed` de ellos,
+    el frame se considera estático y puede reutilizar el resultado anterior.
+    Contar píxeles (en vez de promediar la diferencia) evita que un cambio
+    chico pero real, como un celular que aparece, se diluya en el frame.
+    La referencia es el último frame que sí se analizó (no el anterior), así
+    que un cambio lento no pasa inadvertido acumulándose de a poco. Pasados
+    `max_age` segundos desde ese análisis se fuerza uno nuevo.
+    """
+
+    def __init__(self, size=(64, 48), pixel_threshold=10, max_changed=0.003, max_age=2.0):
+        self.size = size
+        self.pixel_threshold = pixel_threshold
+        self.max_changed = max_changed
+        self.max_age = max_age
+
+        width, height = size
+        self._thumbnail = np.empty((height, width), np.uint8)
+        self._reference = np.empty((height, width), np.uint8)
+        self._diff = np.empty((height, width), np.uint8)
+
+        # Estadísticas
+        self.hits = 0
+        self.misses = 0
+
+        self.reset()
+
+    def reset(self):
+        """Olvidar la referencia; el próximo frame se analiza siempre"""
+        self._reference_time = None
+        self._key = None
+
+    def check(self, gray, timestamp, key=None):
+        """True si el frame puede reutilizar el último resultado.
+
+        `key` identifica la configuración del análisis (por ejemplo, el
+        método de detección); si cambia, el resultado anterior no sirve.
+        """
+        cv2.resize(gray, self.size, dst=self._thumbnail, interpolation=cv2.INTER_AREA)
+
+        if (self._reference_time is not None and key == self._key
+                and timestamp - self._reference_time <= self.max_age):
+            cv2.absdiff(self._thumbnail, self._reference, dst=self._diff)
+            cv2.threshold(self._diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self._diff)
+            if cv2.countNonZero(self._diff) <= self.max_changed * self._diff.size:
+                self.hits += 1
+                return True
+
+        self.misses += 1
+        self._thumbnail, self._reference = self._reference, self._thumbnail
+        self._reference_time = timestamp
+        self._key = key
+        return False
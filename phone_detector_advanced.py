@@ -10,16 +10,22 @@ import json
 import os
 from PIL import Image, ImageTk
 
+from detector_core import (CAMERA_BACKENDS, PROCESS_LAYOUTS, CameraProbe, DetectionGraph, FrameBuffers, FrameContext,
+                           FrameGrabber, ProcessPipeline, candidates_to_detections, faces_to_detections,
+                           find_phone_candidates)
+
 class AdvancedPhoneDetector:
+    # Etapas que en la distribución 'split' corren en un proceso aparte (sin entradas del grafo)
+    PROCESS_SPLIT = ('hand_landmarks',)
+    
     def __init__(self):
-        # OpenCV para detección facial (Haar Cascades)
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
         # Variables de detección
         self.cap = None
+        self.grabber = None
+        self.pipeline = None
+        self.pipeline_lock = threading.Lock()
         self.is_monitoring = False
         self.detection_start_time = None
-        self.last_frame = None
         self.current_frame = None
         self.show_camera = False
         
@@ -38,7 +44,14 @@ class AdvancedPhoneDetector:
             'phone_max_area': 50000,
             'canny_low': 50,
             'canny_high': 150,
-            'hand_confidence_threshold': 0.7
+            'hand_confidence_threshold': 0.7,
+            'camera_probe_timeout': 3.0,  # Segundos por intento al buscar cámaras
+            'camera_hold_seconds': 10.0,  # Segundos que la cámara encontrada queda abierta esperando Iniciar
+            'camera_cache_file': 'camera_cache.json',  # Cámaras encontradas por equipo
+            'camera_profile_file': 'camera_profile.json',  # Modos medidos (benchmark_camera_modes.py)
+            'min_capture_size': (640, 360),  # Resolución mínima al elegir modo del perfil
+            'reuse_buffers': True,  # Derivados y display en buffers preasignados (sin reservar memoria por frame)
+            'process_layout': 'inline'  # 'inline', 'worker' (detección en otro proceso) o 'split' (y MediaPipe en un tercero)
         }
         
         # Estadísticas
@@ -48,10 +61,6 @@ class AdvancedPhoneDetector:
             'alerts_triggered': 0
         }
         
-        # Debug info
-        self.debug_info = "Inicializando..."
-        self.detection_data = {}
-        
         # Inicializar pygame para sonidos
         try:
             pygame.mixer.init()
@@ -65,8 +74,32 @@ class AdvancedPhoneDetector:
         # Información de cámaras disponibles
         self.detect_available_cameras()
         
+        self.setup_detection()
+    
+    @classmethod
+    def headless(cls, config):
+        """Detector sin ventana ni cámara, solo con el estado de detección (para un proceso de detección)"""
+        detector = cls.__new__(cls)
+        detector.config = dict(config)
+        detector.setup_detection()
+        return detector
+    
+    def setup_detection(self):
+        """Detectores y su estado entre frames"""
+        # OpenCV para detección facial (Haar Cascades)
+        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+        self.last_frame = None
+        self.buffers = FrameBuffers(self.config['reuse_buffers'])
+        
+        # Debug info
+        self.debug_info = "Inicializando..."
+        self.detection_data = {}
+        
         # Intentar importar MediaPipe
         self.init_mediapipe()
+        
+        # Métodos de detección
+        self.detection_graph = self.build_detection_graph()
     
     def init_mediapipe(self):
         """Inicializar MediaPipe si está disponible"""
@@ -102,47 +135,25 @@ class AdvancedPhoneDetector:
             self.mp = None
     
     def detect_available_cameras(self):
-        """Detectar cámaras disponibles y sus backends"""
+        """Detectar cámaras disponibles y sus backends (caché por equipo; se prueban en segundo plano)"""
         print("Detectando cámaras disponibles...")
-        available_cameras = []
-        
-        # Probar diferentes backends
-        backends = [
-            (cv2.CAP_DSHOW, "DirectShow"),
-            (cv2.CAP_MSMF, "Media Foundation"),
-            (cv2.CAP_V4L2, "V4L2"),
-            (cv2.CAP_ANY, "Auto")
-        ]
-        
-        for idx in range(3):  # Probar hasta 3 cámaras
-            for backend_id, backend_name in backends:
-                try:
-                    cap = cv2.VideoCapture(idx, backend_id)
-                    if cap.isOpened():
-                        ret, frame = cap.read()
-                        if ret:
-                            width = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-                            height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-                            fps = cap.get(cv2.CAP_PROP_FPS)
-                            available_cameras.append({
-                                'index': idx,
-                                'backend': backend_name,
-                                'resolution': f"{int(width)}x{int(height)}",
-                                'fps': int(fps)
-                            })
-                            print(f"OK: Cámara {idx}: {backend_name} - {int(width)}x{int(height)} @ {int(fps)}fps")
-                            cap.release()
-                            break
-                    cap.release()
-                except:
-                    continue
-        
+        self.camera_probe = CameraProbe(
+            backends=("DirectShow", "Media Foundation", "V4L2", "Auto"),
+            timeout=self.config['camera_probe_timeout'],
+            hold_seconds=self.config['camera_hold_seconds'],
+            cache_file=self.config['camera_cache_file'],
+            profile_file=self.config['camera_profile_file']
+        )
+        self.set_available_cameras(self.camera_probe.discover(on_update=self.set_available_cameras))
+    
+    def set_available_cameras(self, available_cameras):
+        """Actualizar la lista de cámaras (también desde la revalidación en segundo plano)"""
         if not available_cameras:
-            print("WARNING: No se detectaron cámaras funcionales")
+            print("WARNING: Sin cámaras conocidas todavía")
         else:
             print(f"Total de cámaras detectadas: {len(available_cameras)}")
             
-        self.available_cameras = available_cameras
+        self.available_cameras = list(available_cameras)
         
     def setup_gui(self):
         self.root = tk.Tk()
@@ -329,57 +340,67 @@ class AdvancedPhoneDetector:
             self.toggle_camera_button.config(text="📹 Mostrar Cámara")
             self.camera_label.config(image='', text="Vista de cámara oculta")
     
-    def update_camera_display(self, frame):
+    def update_camera_display(self, ctx):
         """Actualizar display de cámara con visualizaciones"""
         if not self.show_camera:
             return
             
         try:
-            # Crear una copia del frame para dibujar
-            display_frame = frame.copy()
-            
-            # Agregar visualizaciones según el método de detección
-            method = self.detection_method.get()
-            
-            if method == "advanced_hybrid" or method == "shape_detection":
-                self.draw_shape_detection(display_frame)
-            
-            if method == "face_only" or method == "advanced_hybrid":
-                self.draw_face_detection(display_frame)
-                
-            if method == "mediapipe_hands" and self.hand_tracking_enabled:
-                self.draw_hand_detection(display_frame)
-            
-            # Agregar información de debug
-            self.draw_debug_info(display_frame)
-            
-            # Redimensionar para display
-            display_frame = cv2.resize(display_frame, (320, 240))
+            # Usando los resultados que los detectores ya guardaron en el contexto
+            self.show_camera_image(self.render_view(ctx.frame, ctx.results))
             
-            # Convertir a formato tkinter
-            display_frame_rgb = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-            image = Image.fromarray(display_frame_rgb)
-            photo = ImageTk.PhotoImage(image)
+        except Exception as e:
+            print(f"ERROR: Error actualizando display: {e}")
+    
+    def update_record_display(self, frame, record):
+        """Actualizar display con un frame analizado en otro proceso (`frame` es su slot compartido)"""
+        if not self.show_camera:
+            return
             
-            # Actualizar label
-            self.camera_label.config(image=photo, text='')
-            self.camera_label.image = photo  # Mantener referencia
+        try:
+            self.show_camera_image(self.render_view(frame, record.results))
             
         except Exception as e:
             print(f"ERROR: Error actualizando display: {e}")
     
-    def draw_face_detection(self, frame):
+    def render_view(self, frame, results):
+        """Copia de `frame` con las visualizaciones del método actual, en RGB de 320x240"""
+        # Crear una copia del frame para dibujar
+        display_frame = self.buffers.copy('display', frame)
+        
+        # Agregar visualizaciones según el método de detección
+        method = self.detection_method.get()
+        
+        if method == "advanced_hybrid" or method == "shape_detection":
+            self.draw_shape_detection(display_frame, results.get('phones', []))
+        
+        if method == "face_only" or method == "advanced_hybrid":
+            self.draw_face_detection(display_frame, results.get('faces', []))
+            
+        if method == "mediapipe_hands" and self.hand_tracking_enabled:
+            self.draw_hand_detection(display_frame, results.get('hand_landmarks', []))
+        
+        # Agregar información de debug
+        self.draw_debug_info(display_frame)
+        
+        # Redimensionar para display
+        display_frame = cv2.resize(display_frame, (320, 240))
+        return cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
+    
+    def show_camera_image(self, rgb):
+        """Mostrar una imagen RGB en la etiqueta de la cámara"""
+        # Convertir a formato tkinter
+        image = Image.fromarray(rgb)
+        photo = ImageTk.PhotoImage(image)
+        
+        # Actualizar label
+        self.camera_label.config(image=photo, text='')
+        self.camera_label.image = photo  # Mantener referencia
+    
+    def draw_face_detection(self, frame, faces):
         """Dibujar detección de rostros"""
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=self.config['face_sensitivity'],
-                minNeighbors=5,
-                minSize=self.config['min_face_size']
-            )
-            
-            for (x, y, w, h) in faces:
+            for (x, y, w, h, _, _) in faces:
                 # Dibujar rectángulo verde para rostros
                 cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
                 cv2.putText(frame, 'ROSTRO', (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
@@ -387,32 +408,27 @@ class AdvancedPhoneDetector:
         except Exception as e:
             print(f"ERROR: Error dibujando rostros: {e}")
     
-    def draw_shape_detection(self, frame):
+    def draw_shape_detection(self, frame, phone_candidates):
         """Dibujar detección de formas rectangulares"""
         try:
-            phone_candidates = self.detect_phone_shapes(frame)
-            
             for phone in phone_candidates:
-                x, y, w, h = phone['x'], phone['y'], phone['w'], phone['h']
+                x, y, w, h = phone.x, phone.y, phone.w, phone.h
                 # Dibujar rectángulo azul para posibles celulares
                 cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
                 cv2.putText(frame, f'CELULAR?', (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
-                cv2.putText(frame, f'{phone["aspect_ratio"]:.1f}', (x, y+h+15), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 0), 1)
+                cv2.putText(frame, f'{phone.aspect_ratio:.1f}', (x, y+h+15), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 0), 1)
                 
         except Exception as e:
             print(f"ERROR: Error dibujando formas: {e}")
     
-    def draw_hand_detection(self, frame):
+    def draw_hand_detection(self, frame, hand_landmarks_list):
         """Dibujar detección de manos con MediaPipe"""
         if not self.hand_tracking_enabled:
             return
             
         try:
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(rgb_frame)
-            
-            if results.multi_hand_landmarks:
-                for hand_landmarks in results.multi_hand_landmarks:
+            if hand_landmarks_list:
+                for hand_landmarks in hand_landmarks_list:
                     # Dibujar landmarks de manos
                     self.mp_drawing.draw_landmarks(
                         frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
@@ -458,25 +474,24 @@ class AdvancedPhoneDetector:
     def start_monitoring(self):
         """Iniciar monitoreo"""
         try:
-            # Verificar cámara usando las cámaras detectadas
-            self.cap = None
+            # Con un perfil medido, el modo más barato que alcanza a los detectores
+            self.cap, capture_mode = self.camera_probe.open_mode(self.config['min_capture_size'], 20)
+            
+            # Si no, la cámara que dejó abierta la búsqueda se usa directamente
+            if not self.cap:
+                self.cap = self.camera_probe.take()
+                if self.cap:
+                    print("OK: Usando la cámara abierta durante la detección")
             
-            # Primero probar las cámaras detectadas
-            if hasattr(self, 'available_cameras') and self.available_cameras:
+            # Si no, probar las cámaras detectadas
+            if not self.cap and self.available_cameras:
                 for camera_info in self.available_cameras:
                     idx = camera_info['index']
                     backend = camera_info['backend']
                     print(f"Probando cámara {idx} ({backend})...")
                     
                     # Usar el backend específico si es posible
-                    backend_map = {
-                        "DirectShow": cv2.CAP_DSHOW,
-                        "Media Foundation": cv2.CAP_MSMF,
-                        "V4L2": cv2.CAP_V4L2,
-                        "Auto": cv2.CAP_ANY
-                    }
-                    
-                    backend_id = backend_map.get(backend, cv2.CAP_ANY)
+                    backend_id = CAMERA_BACKENDS.get(backend, cv2.CAP_ANY)
                     test_cap = cv2.VideoCapture(idx, backend_id)
                     
                     if test_cap.isOpened():
@@ -526,9 +541,10 @@ Soluciones comunes:
             
             # Configurar cámara
             try:
-                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                self.cap.set(cv2.CAP_PROP_FPS, 20)
+                if capture_mode is None:
+                    self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+                    self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+                    self.cap.set(cv2.CAP_PROP_FPS, 20)
                 
                 current_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
                 current_height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
@@ -542,6 +558,17 @@ Soluciones comunes:
             self.is_monitoring = True
             self.detection_start_time = None
             self.last_frame = None
+            self.buffers = FrameBuffers(self.config['reuse_buffers'])
+            
+            # Detección en este proceso o en otros (los procesos arrancan con el primer frame)
+            layout = self.config['process_layout']
+            if layout not in PROCESS_LAYOUTS:
+                print(f"ERROR: Distribución de procesos desconocida '{layout}'; se usa 'inline'")
+                layout = 'inline'
+            
+            # Captura en hilo propio: el bucle de detección siempre toma el frame más nuevo
+            self.grabber = FrameGrabber(self.cap)
+            self.grabber.start()
             
             # Actualizar UI
             self.start_button.config(state='disabled')
@@ -553,7 +580,8 @@ Soluciones comunes:
             self.toggle_camera_button.config(text="📹 Ocultar Cámara")
             
             # Iniciar hilo de detección
-            self.detection_thread = threading.Thread(target=self.detection_loop, daemon=True)
+            loop = self.detection_loop if layout == 'inline' else self.process_loop
+            self.detection_thread = threading.Thread(target=loop, daemon=True)
             self.detection_thread.start()
             
             # Iniciar actualización de UI
@@ -568,7 +596,11 @@ Soluciones comunes:
         """Detener monitoreo"""
         self.is_monitoring = False
         
-        if self.cap:
+        # El hilo de captura libera la cámara cuando termina su read() en curso
+        if self.grabber:
+            self.grabber.stop()
+            self.grabber = None
+        elif self.cap:
             self.cap.release()
         
         if self.detection_start_time:
@@ -583,75 +615,73 @@ Soluciones comunes:
         
         print("Monitoreo detenido")
     
+    def build_detection_graph(self):
+        """Métodos de detección como grafos de etapas con entradas declaradas"""
+        graph = DetectionGraph()
+        
+        def report(label):
+            """Etapa final que solo deja el resultado en el debug"""
+            def compute(ctx, detected):
+                self.debug_info = f"{label}: {'✓' if detected else '✗'}"
+                return detected
+            return compute
+        
+        # Entradas compartidas
+        graph.add('faces', self.get_faces)
+        graph.add('hand_landmarks', self.get_hand_landmarks)
+        graph.add('phones', self.detect_phone_shapes)
+        
+        # Detectores
+        graph.add('face', self.detect_face, inputs=('faces',))
+        graph.add('motion', self.detect_motion)
+        graph.add('phone_near_face', self.detect_phone_near_face, inputs=('faces',), lazy=('phones',))
+        graph.add('hands_near_face', self.detect_hands_near_face, inputs=('faces',), lazy=('hand_landmarks',))
+        
+        # Métodos
+        graph.add('face_only', report("Rostros"), inputs=('face',))
+        graph.add('motion_only', report("Movimiento"), inputs=('motion',))
+        graph.add('shape_detection', report("Forma celular"), inputs=('phone_near_face',))
+        graph.add('advanced_hybrid', self.advanced_hybrid_detection, inputs=('face',),
+                  lazy=('hands_near_face', 'phone_near_face'))
+        
+        for name in ('face_only', 'motion_only', 'shape_detection', 'advanced_hybrid'):
+            graph.method(name, name)
+        graph.method('mediapipe_hands', 'hands_near_face')
+        return graph
+    
     def detection_loop(self):
         """Bucle principal de detección"""
-        consecutive_errors = 0
-        max_errors = 10
+        grabber = self.grabber
+        last_seq = 0
         
         while self.is_monitoring:
             try:
-                ret, frame = self.cap.read()
-                if not ret:
-                    consecutive_errors += 1
-                    print(f"ERROR: Error leyendo frame ({consecutive_errors}/{max_errors})")
-                    
-                    if consecutive_errors >= max_errors:
+                packet = grabber.read_latest(last_seq, timeout=1.0)
+                if packet is None:
+                    if grabber.failed:
                         print("ERROR CRITICO: Demasiados errores consecutivos")
                         self.show_camera_error()
                         break
-                    
-                    time.sleep(0.1)
                     continue
                 
-                # Resetear contador de errores
-                consecutive_errors = 0
+                last_seq = packet.seq
+                self.begin_frame()
                 
-                # Voltear horizontalmente para efecto espejo
-                frame = cv2.flip(frame, 1)
-                self.current_frame = frame.copy()
+                # Voltear horizontalmente para efecto espejo (en el buffer del frame)
+                frame = cv2.flip(packet.frame, 1, dst=self.buffers.like('mirror', packet.frame))
+                self.current_frame = frame
                 
-                # Detectar según método seleccionado
-                detected = False
-                method = self.detection_method.get()
+                # Derivados y resultados del frame compartidos por detectores y overlays
+                ctx = self.frame_context(frame, packet.seq, packet.timestamp)
                 
-                if method == "face_only":
-                    detected = self.detect_face(frame)
-                    self.debug_info = f"Rostros: {'✓' if detected else '✗'}"
-                    
-                elif method == "motion_only":
-                    detected = self.detect_motion(frame)
-                    self.debug_info = f"Movimiento: {'✓' if detected else '✗'}"
-                    
-                elif method == "shape_detection":
-                    detected = self.detect_phone_near_face(frame)
-                    self.debug_info = f"Forma celular: {'✓' if detected else '✗'}"
-                    
-                elif method == "mediapipe_hands" and self.hand_tracking_enabled:
-                    detected = self.detect_hands_near_face(frame)
-                    
-                elif method == "advanced_hybrid":
-                    # Método más avanzado
-                    face_detected = self.detect_face(frame)
-                    
-                    if self.hand_tracking_enabled:
-                        hands_detected = self.detect_hands_near_face(frame)
-                        phone_detected = self.detect_phone_near_face(frame)
-                        # Detectar si hay rostro Y (manos cerca O forma de celular)
-                        detected = face_detected and (hands_detected or phone_detected)
-                        self.debug_info = f"Cara:{face_detected} Manos:{hands_detected} Forma:{phone_detected}"
-                    else:
-                        phone_detected = self.detect_phone_near_face(frame)
-                        detected = face_detected and phone_detected
-                        self.debug_info = f"Cara: {'✓' if face_detected else '✗'}, Forma: {'✓' if phone_detected else '✗'}"
+                # Detectar según método seleccionado (grafo de etapas compartidas)
+                detected = self.analyze_frame(ctx, self.detection_method.get())
                 
                 # Procesar detección
                 self.process_detection(detected)
                 
                 # Actualizar display de cámara
-                self.update_camera_display(frame)
-                
-                # Guardar frame para comparación de movimiento
-                self.last_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                self.update_camera_display(ctx)
                 
                 time.sleep(0.05)  # 20 FPS
                 
@@ -659,37 +689,156 @@ Soluciones comunes:
                 print(f"ERROR: Error en bucle de detección: {e}")
                 time.sleep(1)
     
-    def detect_face(self, frame):
-        """Detectar rostros usando Haar Cascades"""
+    def process_loop(self):
+        """Bucle con la detección en otros procesos: acá solo se captura, se alerta y se muestra"""
+        grabber = self.grabber
+        last_seq = 0
+        shown = None
+        
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
+            while self.is_monitoring:
+                try:
+                    packet = grabber.read_latest(last_seq, timeout=1.0)
+                    if packet is None:
+                        if grabber.failed:
+                            print("ERROR CRITICO: Demasiados errores consecutivos")
+                            self.show_camera_error()
+                            break
+                        continue
+                    
+                    # Los procesos arrancan con el primer frame (el anillo toma su tamaño)
+                    pipeline = self.pipeline or self.start_pipeline(packet.frame.shape)
+                    if pipeline is None:
+                        print("INFO: Detección en el proceso principal")
+                        return self.detection_loop()
+                    
+                    last_seq = packet.seq
+                    self.begin_frame()
+                    if not pipeline.submit(packet.frame, packet.seq, packet.timestamp,
+                                           self.detection_method.get(), self.config):
+                        continue
+                    
+                    # Mientras se analiza este frame se muestra el anterior (su slot no se toca)
+                    if shown is not None:
+                        self.update_record_display(pipeline.view(shown.slot), shown)
+                    
+                    record = pipeline.wait_result(lambda: self.is_monitoring)
+                    if record is None:
+                        if self.is_monitoring:
+                            print("ERROR: Los procesos de detección terminaron; se sigue en el proceso principal")
+                            self.stop_pipeline()
+                            return self.detection_loop()
+                        break
+                    
+                    self.apply_record(record)
+                    shown = record
+                    time.sleep(0.05)  # 20 FPS
+                    
+                except Exception as e:
+                    print(f"ERROR: Error en bucle de detección: {e}")
+                    time.sleep(1)
+        finally:
+            self.stop_pipeline()
+    
+    def start_pipeline(self, shape):
+        """Lanzar los procesos de detección para frames de `shape`; None si no arrancan"""
+        split = ()
+        if self.config['process_layout'] == 'split':
+            if self.hand_tracking_enabled:
+                split = self.PROCESS_SPLIT
+            else:
+                print("INFO: Sin MediaPipe no hay etapas para otro proceso; se usa 'worker'")
+        pipeline = ProcessPipeline(type(self).headless, self.config, shape, split=split)
+        if not pipeline.start():
+            return None
+        with self.pipeline_lock:
+            self.pipeline = pipeline
+        return pipeline
+    
+    def stop_pipeline(self):
+        """Terminar los procesos de detección (desde el bucle o al cerrar la ventana)"""
+        with self.pipeline_lock:
+            pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            pipeline.stop()
+    
+    def apply_record(self, record):
+        """Resultado de un frame analizado en otro proceso"""
+        self.detection_data.update(record.data)
+        self.debug_info = self.detection_data.get('debug_info', self.debug_info)
+        self.process_detection(record.detected)
+    
+    def begin_frame(self):
+        """Comenzar un frame en el otro juego de buffers"""
+        self.buffers.next_frame()
+    
+    def apply_settings(self, settings):
+        """Cambios de configuración hechos desde la GUI (en un proceso de detección)"""
+        self.config.update(settings)
+    
+    def frame_context(self, frame, seq, timestamp):
+        """Contexto de un frame BGR ya espejado"""
+        return FrameContext(frame, seq, timestamp, buffers=self.buffers)
+    
+    def analyze_frame(self, ctx, method):
+        """Detección de un frame según el método; devuelve la decisión"""
+        detected = self.detection_graph.run(method, ctx)
+        
+        # Guardar frame para comparación de movimiento: el gris queda en el otro
+        # juego de buffers, intacto hasta el próximo frame (doble buffer, sin copiar)
+        self.last_frame = ctx.gray
+        
+        # Para la GUI, que puede estar en otro proceso
+        self.detection_data['debug_info'] = self.debug_info
+        return detected
+    
+    def get_faces(self, ctx):
+        """Rostros del frame: el cascade corre una sola vez por contexto"""
+        def compute():
             faces = self.face_cascade.detectMultiScale(
-                gray,
+                ctx.gray,
                 scaleFactor=self.config['face_sensitivity'],
                 minNeighbors=5,
                 minSize=self.config['min_face_size']
             )
-            
+            ctx.results['faces'] = faces_to_detections(faces)
+            return faces
+        
+        return ctx.cached('faces', compute)
+    
+    def get_hand_landmarks(self, ctx):
+        """Landmarks de manos de MediaPipe: se procesa una sola vez por contexto"""
+        def compute():
+            rgb_frame = cv2.cvtColor(ctx.frame, cv2.COLOR_BGR2RGB)
+            results = self.hands.process(rgb_frame)
+            hand_landmarks = list(results.multi_hand_landmarks or [])
+            ctx.results['hand_landmarks'] = hand_landmarks
+            return hand_landmarks
+        
+        return ctx.cached('hand_landmarks', compute)
+    
+    def detect_face(self, ctx, faces):
+        """Detectar rostros usando Haar Cascades"""
+        try:
             return len(faces) > 0
             
         except Exception as e:
             print(f"ERROR: Error en detección facial: {e}")
             return False
     
-    def detect_motion(self, frame):
+    def detect_motion(self, ctx):
         """Detectar movimiento comparando frames"""
         try:
             if self.last_frame is None:
                 return False
             
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            gray = ctx.gray
             
             # Calcular diferencia absoluta
-            diff = cv2.absdiff(self.last_frame, gray)
+            diff = cv2.absdiff(self.last_frame, gray, dst=ctx.buffer('motion_diff', gray.shape))
             
-            # Aplicar umbral
-            _, thresh = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
+            # Aplicar umbral (in situ)
+            _, thresh = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY, dst=diff)
             
             # Contar píxeles que cambiaron
             motion_pixels = cv2.countNonZero(thresh)
@@ -700,74 +849,41 @@ Soluciones comunes:
             print(f"ERROR: Error en detección de movimiento: {e}")
             return False
     
-    def detect_phone_shapes(self, frame):
+    def detect_phone_shapes(self, ctx):
         """Detectar formas rectangulares que podrían ser celulares"""
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Aplicar filtro gaussiano para reducir ruido
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            
-            # Detectar bordes
-            edges = cv2.Canny(blurred, self.config['canny_low'], self.config['canny_high'])
-            
-            # Encontrar contornos
-            contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            phone_candidates = []
-            
-            for contour in contours:
-                # Calcular área del contorno
-                area = cv2.contourArea(contour)
-                
-                # Filtrar por área
-                if area < self.config['phone_min_area'] or area > self.config['phone_max_area']:
-                    continue
-                
-                # Aproximar contorno a polígono
-                epsilon = 0.02 * cv2.arcLength(contour, True)
-                approx = cv2.approxPolyDP(contour, epsilon, True)
-                
-                # Buscar formas rectangulares (4 vértices)
-                if len(approx) >= 4:
-                    # Calcular rectángulo delimitador
-                    x, y, w, h = cv2.boundingRect(contour)
-                    
-                    # Calcular proporción (celulares suelen ser 16:9 o 18:9)
-                    aspect_ratio = max(w, h) / min(w, h)
-                    
-                    # Filtrar por proporción típica de celular (1.4 a 2.8)
-                    if 1.4 <= aspect_ratio <= 2.8:
-                        phone_candidates.append({
-                            'x': x, 'y': y, 'w': w, 'h': h,
-                            'area': area,
-                            'aspect_ratio': aspect_ratio,
-                            'center': (x + w//2, y + h//2)
-                        })
-            
+            phone_candidates = ctx.cached('phones', lambda: self.find_phone_candidates(ctx))
+            ctx.results['phones'] = phone_candidates
             return phone_candidates
             
         except Exception as e:
             print(f"ERROR: Error en detección de formas: {e}")
             return []
     
-    def detect_phone_near_face(self, frame):
+    def find_phone_candidates(self, ctx):
+        """Candidatos a celular como lista de Detection (puntaje = área del contorno)"""
+        # Aplicar filtro gaussiano para reducir ruido
+        blurred = ctx.blurred(5)
+        
+        # Detectar bordes
+        edges = cv2.Canny(blurred, self.config['canny_low'], self.config['canny_high'])
+        
+        # Encontrar contornos
+        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        
+        # Área, proporción (celulares suelen ser 16:9 o 18:9) y vértices se filtran en bloque
+        candidates = find_phone_candidates(contours, self.config['phone_min_area'], self.config['phone_max_area'],
+                                           min_aspect=1.4, max_aspect=2.8)
+        return candidates_to_detections(candidates, score='area')
+    
+    def detect_phone_near_face(self, ctx, faces, phones):
         """Detectar si hay un objeto similar a celular cerca de la cara"""
         try:
-            # Detectar rostros
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=self.config['face_sensitivity'],
-                minNeighbors=5,
-                minSize=self.config['min_face_size']
-            )
-            
             if len(faces) == 0:
                 return False
             
-            # Detectar formas rectangulares
-            phone_candidates = self.detect_phone_shapes(frame)
+            # Detectar formas rectangulares (solo si hay rostro)
+            phone_candidates = phones()
             
             if not phone_candidates:
                 return False
@@ -777,7 +893,7 @@ Soluciones comunes:
                 face_center = (face_x + face_w//2, face_y + face_h//2)
                 
                 for phone in phone_candidates:
-                    phone_center = phone['center']
+                    phone_center = phone.center
                     
                     # Calcular distancia entre cara y objeto
                     distance = np.sqrt(
@@ -795,43 +911,33 @@ Soluciones comunes:
             print(f"ERROR: Error en detección de celular cerca de cara: {e}")
             return False
     
-    def detect_hands_near_face(self, frame):
+    def detect_hands_near_face(self, ctx, faces, hand_landmarks):
         """Detectar manos cerca de la cara usando MediaPipe"""
         if not self.hand_tracking_enabled:
             return False
             
         try:
-            # Detectar rostros primero
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=self.config['face_sensitivity'],
-                minNeighbors=5,
-                minSize=self.config['min_face_size']
-            )
-            
             if len(faces) == 0:
                 self.debug_info = "Sin rostros detectados"
                 return False
             
             # Detectar manos
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.hands.process(rgb_frame)
+            hand_landmarks_list = hand_landmarks()
             
-            if not results.multi_hand_landmarks:
+            if not hand_landmarks_list:
                 self.debug_info = "Sin manos detectadas"
                 return False
             
             # Verificar si las manos están cerca de la cara
-            h, w = frame.shape[:2]
+            h, w = ctx.shape[:2]
             
             hands_near_face = 0
-            total_hands = len(results.multi_hand_landmarks)
+            total_hands = len(hand_landmarks_list)
             
             for face_x, face_y, face_w, face_h in faces:
                 face_center = (face_x + face_w//2, face_y + face_h//2)
                 
-                for hand_landmarks in results.multi_hand_landmarks:
+                for hand_landmarks in hand_landmarks_list:
                     # Obtener centro de la mano (punto 9 es el centro)
                     hand_center_x = int(hand_landmarks.landmark[9].x * w)
                     hand_center_y = int(hand_landmarks.landmark[9].y * h)
@@ -855,6 +961,20 @@ Soluciones comunes:
             self.debug_info = f"Error manos: {str(e)[:20]}"
             return False
     
+    def advanced_hybrid_detection(self, ctx, face_detected, hands_near_face, phone_near_face):
+        """Método más avanzado: rostro Y (manos cerca O forma de celular)"""
+        if self.hand_tracking_enabled:
+            hands_detected = hands_near_face()
+            phone_detected = phone_near_face()
+            detected = face_detected and (hands_detected or phone_detected)
+            self.debug_info = f"Cara:{face_detected} Manos:{hands_detected} Forma:{phone_detected}"
+        else:
+            phone_detected = phone_near_face()
+            detected = face_detected and phone_detected
+            self.debug_info = f"Cara: {'✓' if face_detected else '✗'}, Forma: {'✓' if phone_detected else '✗'}"
+        
+        return detected
+    
     def process_detection(self, detected):
         """Procesar resultado de detección"""
         current_time = time.time()
@@ -1068,13 +1188,22 @@ Soluciones:
         """Cerrar aplicación"""
         if self.is_monitoring:
             self.stop_monitoring()
+        self.stop_pipeline()
+        self.camera_probe.release()
         print("Aplicación cerrada")
         self.root.destroy()
 
 if __name__ == "__main__":
     # Configurar codificación para Windows
+    import argparse
     import sys
     
+    parser = argparse.ArgumentParser(description="Detector avanzado de uso de celular")
+    parser.add_argument('--procesos', choices=PROCESS_LAYOUTS, default='inline',
+                        help="inline: todo en un proceso | worker: detección en otro proceso | "
+                             "split: además, MediaPipe en un tercero")
+    args = parser.parse_args()
+    
     try:
         sys.stdout.reconfigure(encoding='utf-8')
     except:
@@ -1088,6 +1217,7 @@ if __name__ == "__main__":
     
     try:
         detector = AdvancedPhoneDetector()
+        detector.config['process_layout'] = args.procesos
         detector.run()
     except ImportError as e:
         print(f"ERROR: Falta instalar: {e}")
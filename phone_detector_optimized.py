@@ -1,7 +1,7 @@
 import cv2
-import numpy as np
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import tkinter as tk
 from tkinter import ttk, messagebox
 import pygame
@@ -10,20 +10,26 @@ import json
 import os
 from PIL import Image, ImageTk
 
+from detector_core import (CAMERA_BACKENDS, ActivityRate, CameraProbe, Detection, DetectionGraph, FaceSearch,
+                           FaceTracker, FrameBudget, FrameBuffers, FrameContext, FrameGrabber, LazyFusion, MotionModel,
+                           PROCESS_LAYOUTS, ProcessPipeline, RawDecoder, ResolutionScaler, StageSchedule, StaticGate,
+                           candidates_to_detections, extract_phone_candidates, faces_to_detections,
+                           foveal_phone_candidates, merge_rectangles, scale_detections)
+
 class OptimizedPhoneDetector:
+    # Etapas que en la distribución 'split' corren en un proceso aparte (sin entradas del grafo)
+    PROCESS_SPLIT = ('phones',)
+    # Métodos que deciden por el movimiento: en un frame estático su decisión anterior quedó vieja
+    UNGATED_METHODS = ('motion_only', 'hands_only')
+    
     def __init__(self):
-        # OpenCV cascades
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        
-        # Las cascadas de manos no están incluidas en OpenCV por defecto
-        self.hand_detection_available = False
-        print("INFO: Usando detección de regiones de manos basada en movimiento")
-        
         # Variables de detección
         self.cap = None
+        self.grabber = None
+        self.pipeline = None
+        self.pipeline_lock = threading.Lock()
         self.is_monitoring = False
         self.detection_start_time = None
-        self.last_frame = None
         self.current_frame = None
         self.show_camera = False
         
@@ -39,7 +45,61 @@ class OptimizedPhoneDetector:
             'canny_low': 30,
             'canny_high': 100,
             'hand_region_factor': 1.5,  # Factor para región de búsqueda de manos
-            'min_contour_solidity': 0.3  # Solidez mínima para objetos válidos
+            'min_contour_solidity': 0.3,  # Solidez mínima para objetos válidos
+            'face_tracking': True,  # Seguir el rostro entre detecciones Haar
+            'face_redetect_interval': 10,  # Frames entre detecciones completas
+            'tracker_min_points': 6,  # Puntos mínimos por rostro para seguir
+            'tracker_min_confidence': 0.6,  # Fracción mínima de puntos válidos
+            'face_roi_search': True,  # Buscar solo alrededor del último rostro
+            'face_roi_expand': 0.5,  # Margen de la ventana, relativo al rostro
+            'face_full_scan_interval': 15,  # Búsquedas en ventana antes de un escaneo completo
+            'motion_model': 'running_average',  # 'running_average' o 'mog2'
+            'motion_learning_rate': 0.05,  # Velocidad de adaptación del fondo
+            'motion_threshold': 25,  # Diferencia mínima de gris para primer plano
+            'shape_preprocessing': 'full',  # 'full' o 'fast' (media resolución; menos candidatos, ver benchmark)
+            'static_gate': True,  # Reutilizar el resultado anterior en frames sin cambios
+            'static_pixel_threshold': 10,  # Diferencia de gris para que un píxel de la miniatura cambie
+            'static_max_changed': 0.003,  # Fracción máxima de píxeles cambiados en un frame estático
+            'static_max_reuse_age': 2.0,  # Segundos máximos reutilizando un mismo análisis
+            'shape_dirty_regions': False,  # Buscar formas solo dentro de las zonas en movimiento
+            'dirty_padding': 24,  # Margen (px) alrededor de cada zona en movimiento
+            'dirty_min_area': 150,  # Píxeles mínimos de una zona para tenerla en cuenta
+            'dirty_max_fraction': 0.5,  # Sobre esta fracción del frame se procesa completo
+            'face_rate': 10.0,  # Hz objetivo de cada detector (0 = todos los frames)
+            'motion_rate': 20.0,
+            'shapes_rate': 4.0,
+            'hands_rate': 10.0,
+            'face_max_staleness': 0.3,  # Segundos máximos usando un resultado viejo
+            'motion_max_staleness': 0.05,  # Igual al período: el movimiento nunca se posterga
+            'shapes_max_staleness': 0.5,
+            'hands_max_staleness': 0.3,
+            'frame_budget_ms': 40,  # Presupuesto por frame; formas, manos y overlays ceden (0 = sin límite)
+            'adaptive_rate': True,  # Bajar los FPS cuando no hay nadie frente a la cámara
+            'idle_fps': 2,  # Sin rostro y casi sin movimiento
+            'motion_fps': 10,  # Rostro o movimiento, sin sesión de uso
+            'active_fps': 20,  # Sesión de uso en curso
+            'idle_motion_threshold': 0.5,  # % del frame en movimiento que cuenta como actividad
+            'idle_delay': 5.0,  # Segundos sostenidos antes de bajar un nivel
+            'resolution_scaling': True,  # Procesar a menor escala si el frame tarda demasiado
+            'processing_scales': (1.0, 0.75, 0.5),  # Escalones posibles (los umbrales en px valen a 1.0)
+            'processing_target_ms': 30,  # Tiempo por frame buscado por el control de escala
+            'processing_width': 640,  # Ancho al que valen los umbrales en px (escala 1.0)
+            'foveated': False,  # Capturar en alta y verificar celulares a resolución completa
+            'foveated_capture': (1280, 720),  # Resolución de captura en modo foveado
+            'fovea_padding': 0.5,  # Margen alrededor de cada candidato, relativo a su tamaño
+            'fovea_face_expand': 0.5,  # Margen alrededor de cada rostro, relativo a su tamaño
+            'fovea_min_area_factor': 0.5,  # Área mínima en la fóvea respecto de phone_min_area
+            'camera_probe_timeout': 3.0,  # Segundos por intento al buscar cámaras
+            'camera_hold_seconds': 10.0,  # Segundos que la cámara encontrada queda abierta esperando Iniciar
+            'camera_cache_file': 'camera_cache.json',  # Cámaras encontradas por equipo
+            'camera_profile_file': 'camera_profile.json',  # Modos medidos (benchmark_camera_modes.py)
+            'min_capture_size': (640, 360),  # Resolución mínima al elegir modo del perfil
+            'raw_capture': False,  # Pedir YUYV/MJPEG crudo y sacar el gris sin convertir a BGR
+            'raw_fourcc': 'YUYV',  # Formato crudo si el perfil no indica otro ('YUYV' o 'MJPG')
+            'reuse_buffers': True,  # Derivados y display en buffers preasignados (sin reservar memoria por frame)
+            'parallel_stages': False,  # Cascade, formas y movimiento en hilos dentro de cada frame
+            'stage_workers': 3,  # Hilos para las etapas en paralelo
+            'process_layout': 'inline'  # 'inline', 'worker' (detección en otro proceso) o 'split' (y formas en un tercero)
         }
         
         # Estadísticas
@@ -49,14 +109,7 @@ class OptimizedPhoneDetector:
             'alerts_triggered': 0
         }
         
-        # Debug info
-        self.debug_info = "Inicializando..."
-        self.detection_data = {
-            'faces_count': 0,
-            'phone_candidates': 0,
-            'hand_regions': 0,
-            'motion_level': 0
-        }
+        self.setup_detection()
         
         # Inicializar pygame
         try:
@@ -69,51 +122,102 @@ class OptimizedPhoneDetector:
         self.load_stats()
         self.detect_available_cameras()
     
-    def detect_available_cameras(self):
-        """Detectar cámaras disponibles"""
-        print("Detectando cámaras disponibles...")
-        self.available_cameras = []
+    @classmethod
+    def headless(cls, config):
+        """Detector sin ventana ni cámara, solo con el estado de detección (para un proceso de detección)"""
+        detector = cls.__new__(cls)
+        detector.config = dict(config)
+        detector.setup_detection()
+        return detector
+    
+    def setup_detection(self):
+        """Detectores y su estado entre frames"""
+        # OpenCV cascades
+        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
         
-        # Probar diferentes backends
-        backends = [
-            (cv2.CAP_DSHOW, "DirectShow"),
-            (cv2.CAP_MSMF, "Media Foundation"),
-            (cv2.CAP_ANY, "Auto")
-        ]
+        # Las cascadas de manos no están incluidas en OpenCV por defecto
+        self.hand_detection_available = False
+        print("INFO: Usando detección de regiones de manos basada en movimiento")
         
-        for idx in range(3):
-            for backend_id, backend_name in backends:
-                try:
-                    cap = cv2.VideoCapture(idx, backend_id)
-                    if cap.isOpened():
-                        ret, frame = cap.read()
-                        if ret and frame is not None:
-                            width = cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-                            height = cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-                            self.available_cameras.append({
-                                'index': idx,
-                                'backend': backend_name,
-                                'resolution': f"{int(width)}x{int(height)}"
-                            })
-                            print(f"✅ Cámara {idx}: {backend_name} - {int(width)}x{int(height)}")
-                            cap.release()
-                            break
-                    cap.release()
-                except Exception as e:
-                    if cap:
-                        cap.release()
-                    continue
+        self.last_faces = None
+        self.face_tracker = self.create_face_tracker()
+        self.face_search = FaceSearch(
+            self.face_cascade,
+            expand=self.config['face_roi_expand'],
+            full_scan_interval=self.config['face_full_scan_interval']
+        )
+        self.motion_model = self.create_motion_model()
+        self.fusion = LazyFusion()
+        self.schedule = self.create_schedule()
+        self.frame_budget = FrameBudget(self.config['frame_budget_ms'])
+        self.activity_rate = self.create_activity_rate()
+        self.resolution = self.create_resolution_scaler()
+        self.detection_graph = self.build_detection_graph()
+        self.static_gate = self.create_static_gate()
+        self.gated_result = None
+        self.last_decision = False
+        self.scale_settle = 0  # Frames tras un cambio de escala en que se sostiene la decisión anterior
+        self.fovea_cache = None
+        self.raw_decoder = None
+        self.buffers = FrameBuffers(self.config['reuse_buffers'])
+        
+        # Debug info
+        self.debug_info = "Inicializando..."
+        self.detection_data = {
+            'faces_count': 0,
+            'phone_candidates': 0,
+            'hand_regions': 0,
+            'motion_level': 0,
+            'dropped_frames': 0,
+            'skipped_face': 0,
+            'skipped_hands': 0,
+            'skipped_shapes': 0,
+            'skipped_motion': 0,
+            'unused_face': 0,  # Saltadas por la fusión pero ya calculadas en paralelo
+            'unused_hands': 0,
+            'unused_shapes': 0,
+            'unused_motion': 0,
+            'gate_hits': 0,
+            'gate_misses': 0,
+            'dirty_fraction': 1.0,
+            'shed_shapes': 0,
+            'shed_hands': 0,
+            'shed_overlay': 0,
+            'capture_rate': 'active',
+            'activity_motion': 0.0,
+            'processing_scale': 1.0,
+            'stage_ms': {},
+            'stage_hz': {}
+        }
+    
+    def detect_available_cameras(self):
+        """Detectar cámaras disponibles (caché por equipo; se prueban en segundo plano)"""
+        print("Detectando cámaras disponibles...")
+        self.camera_probe = CameraProbe(
+            backends=("DirectShow", "Media Foundation", "Auto"),
+            timeout=self.config['camera_probe_timeout'],
+            hold_seconds=self.config['camera_hold_seconds'],
+            cache_file=self.config['camera_cache_file'],
+            profile_file=self.config['camera_profile_file']
+        )
+        self.set_available_cameras(self.camera_probe.discover(on_update=self.set_available_cameras))
+    
+    def set_available_cameras(self, cameras):
+        """Actualizar la lista de cámaras (también desde la revalidación en segundo plano)"""
+        available_cameras = list(cameras)
         
-        if not self.available_cameras:
-            print("⚠️ No se detectaron cámaras funcionales")
+        if not available_cameras:
+            print("⚠️ Sin cámaras conocidas todavía")
             # Agregar cámara por defecto para intentar
-            self.available_cameras.append({
+            available_cameras.append({
                 'index': 0,
                 'backend': 'Default',
                 'resolution': '640x480'
             })
         else:
-            print(f"📹 Total de cámaras detectadas: {len(self.available_cameras)}")
+            print(f"📹 Total de cámaras detectadas: {len(available_cameras)}")
+        
+        self.available_cameras = available_cameras
     
     def setup_gui(self):
         self.root = tk.Tk()
@@ -308,23 +412,23 @@ class OptimizedPhoneDetector:
     def start_monitoring(self):
         """Iniciar monitoreo"""
         try:
-            # Probar cámaras detectadas con sus backends
-            self.cap = None
+            # Con un perfil medido, el modo más barato que alcanza a los detectores
+            min_size = self.config['foveated_capture'] if self.config['foveated'] else self.config['min_capture_size']
+            self.cap, capture_mode = self.camera_probe.open_mode(min_size, self.config['active_fps'])
             
-            for camera_info in self.available_cameras:
+            # Si no, la cámara que dejó abierta la búsqueda se usa directamente
+            if not self.cap:
+                self.cap = self.camera_probe.take()
+                if self.cap:
+                    print("✅ Usando la cámara abierta durante la detección")
+            
+            # Si no, probar cámaras detectadas con sus backends
+            for camera_info in ([] if self.cap else self.available_cameras):
                 idx = camera_info['index']
                 backend_name = camera_info.get('backend', 'Default')
                 print(f"Probando cámara {idx} ({backend_name})...")
                 
-                # Mapear backends
-                backend_map = {
-                    "DirectShow": cv2.CAP_DSHOW,
-                    "Media Foundation": cv2.CAP_MSMF,
-                    "Auto": cv2.CAP_ANY,
-                    "Default": cv2.CAP_ANY
-                }
-                
-                backend_id = backend_map.get(backend_name, cv2.CAP_ANY)
+                backend_id = CAMERA_BACKENDS.get(backend_name, cv2.CAP_ANY)
                 
                 try:
                     test_cap = cv2.VideoCapture(idx, backend_id)
@@ -364,14 +468,39 @@ class OptimizedPhoneDetector:
                                        f"No se pudo acceder a ninguna cámara.\n\nError: {str(e)}\n\nVerifica que:\n• La cámara esté conectada\n• No esté siendo usada por otra app\n• Tengas permisos de cámara")
                     return
             
-            # Configurar cámara
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            self.cap.set(cv2.CAP_PROP_FPS, 20)
+            # Configurar cámara (en modo foveado, captura en alta; se procesa reducido)
+            if capture_mode is None:
+                width, height = self.config['foveated_capture'] if self.config['foveated'] else (640, 480)
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                self.cap.set(cv2.CAP_PROP_FPS, self.config['active_fps'])
             
             self.is_monitoring = True
             self.detection_start_time = None
-            self.last_frame = None
+            self.activity_rate = self.create_activity_rate()
+            self.resolution = self.create_resolution_scaler()
+            self.buffers = FrameBuffers(self.config['reuse_buffers'])
+            self.detection_graph.executor = self.create_stage_executor()
+            self.reset_frame_state()
+            
+            # Detección en este proceso o en otros (los procesos arrancan con el primer frame)
+            layout = self.config['process_layout']
+            if layout not in PROCESS_LAYOUTS:
+                print(f"ERROR: Distribución de procesos desconocida '{layout}'; se usa 'inline'")
+                layout = 'inline'
+            
+            # Captura cruda: el gris sale directo del buffer y el color solo se decodifica para mostrar
+            self.raw_decoder = None
+            if self.config['raw_capture'] and layout != 'inline':
+                print("WARNING: La captura cruda no se usa con detección en otros procesos")
+            elif self.config['raw_capture']:
+                fourcc = capture_mode['fourcc'] if capture_mode and capture_mode['fourcc'] in ('YUYV', 'MJPG') \
+                    else self.config['raw_fourcc']
+                self.raw_decoder = RawDecoder.open(self.cap, fourcc, target_width=self.config['processing_width'])
+            
+            # Captura en hilo propio: el bucle de detección siempre toma el frame más nuevo
+            self.grabber = FrameGrabber(self.cap)
+            self.grabber.start()
             
             # UI
             self.start_button.config(state='disabled')
@@ -383,7 +512,8 @@ class OptimizedPhoneDetector:
             self.toggle_camera_button.config(text="📹 Ocultar Cámara", bg='#e53e3e')
             
             # Iniciar hilo
-            self.detection_thread = threading.Thread(target=self.detection_loop, daemon=True)
+            loop = self.detection_loop if layout == 'inline' else self.process_loop
+            self.detection_thread = threading.Thread(target=loop, daemon=True)
             self.detection_thread.start()
             
             self.update_ui()
@@ -396,7 +526,11 @@ class OptimizedPhoneDetector:
         """Detener monitoreo"""
         self.is_monitoring = False
         
-        if self.cap:
+        # El hilo de captura libera la cámara cuando termina su read() en curso
+        if self.grabber:
+            self.grabber.stop()
+            self.grabber = None
+        elif self.cap:
             self.cap.release()
         
         if self.detection_start_time:
@@ -410,74 +544,408 @@ class OptimizedPhoneDetector:
         
         print("Monitoreo detenido")
     
+    def build_detection_graph(self):
+        """Métodos de detección como grafos de etapas con entradas declaradas"""
+        graph = DetectionGraph(default='intelligent',  # intelligent (legacy) para métodos desconocidos
+                               schedule=self.schedule, budget=self.frame_budget)
+        
+        # Entradas compartidas
+        graph.add('faces', self.get_faces)
+        graph.add('motion_mask', self.get_motion_mask)
+        # Con zonas sucias los candidatos dependen del movimiento: la máscara es su entrada declarada
+        graph.add('phones', self.get_phones, lazy=('motion_mask',) if self.config['shape_dirty_regions'] else ())
+        graph.add('hand_regions', self.detect_hand_regions, inputs=('faces',))
+        
+        # Detectores
+        graph.add('face', self.detect_face, inputs=('faces',))
+        graph.add('motion', self.detect_motion, inputs=('motion_mask',))
+        graph.add('shapes', self.detect_phone_shapes_advanced, inputs=('phones',), lazy=('faces',))
+        graph.add('hands', self.detect_hands_optimized, inputs=('faces',), lazy=('hand_regions',))
+        
+        # Fusiones: las entradas perezosas solo se calculan si la decisión las necesita
+        graph.add('intelligent', self.intelligent_detection, inputs=('face', 'faces'),
+                  lazy=('shapes', 'hand_regions'))
+        graph.add('intelligent_flexible', self.intelligent_detection_flexible,
+                  lazy=('face', 'hands', 'shapes', 'motion'))
+        
+        # Prescindibles si el frame se atrasa: sin candidatos ni regiones de mano
+        graph.sheddable('phones', [])
+        graph.sheddable('hand_regions', [])
+        
+        # Con hilos, las fusiones lanzan juntas las entradas caras e independientes: la latencia
+        # es la de la más lenta y no la suma, a costa de calcular alguna que la fusión no use
+        for fusion in ('intelligent', 'intelligent_flexible'):
+            graph.concurrent(fusion, ('faces', 'phones', 'motion_mask'))
+        
+        graph.method('face_only', 'face')
+        graph.method('motion_only', 'motion')
+        graph.method('shapes_only', 'shapes')
+        graph.method('hands_only', 'hands')
+        graph.method('intelligent', 'intelligent')
+        graph.method('intelligent_flexible', 'intelligent_flexible')
+        return graph
+    
+    def create_stage_executor(self):
+        """Pool de hilos para las etapas en paralelo (None si está desactivado)"""
+        previous = self.detection_graph.executor
+        if previous is not None:
+            previous.shutdown(wait=False)
+        
+        if not self.config['parallel_stages']:
+            return None
+        print(f"INFO: Etapas en paralelo con {self.config['stage_workers']} hilos")
+        return ThreadPoolExecutor(max_workers=self.config['stage_workers'], thread_name_prefix='DetectionStage')
+    
+    # Etapa del grafo que se programa por cada detector (la entrada cara, no la decisión)
+    DETECTOR_STAGES = {
+        'face': 'faces',
+        'motion': 'motion_mask',
+        'shapes': 'phones',
+        'hands': 'hand_regions',
+    }
+    
+    def create_schedule(self):
+        """Frecuencias por detector según la configuración actual"""
+        schedule = StageSchedule()
+        for detector, stage in self.DETECTOR_STAGES.items():
+            schedule.set_rate(stage, self.config[f'{detector}_rate'], self.config[f'{detector}_max_staleness'])
+        return schedule
+    
+    def set_detector_rate(self, detector, rate, max_staleness=None):
+        """Cambiar en caliente la frecuencia (Hz) de un detector"""
+        if detector not in self.DETECTOR_STAGES:
+            print(f"ERROR: detector desconocido '{detector}'")
+            return
+        
+        self.config[f'{detector}_rate'] = rate
+        if max_staleness is not None:
+            self.config[f'{detector}_max_staleness'] = max_staleness
+        self.schedule.set_rate(self.DETECTOR_STAGES[detector], rate, self.config[f'{detector}_max_staleness'])
+    
+    def create_static_gate(self):
+        """Crear la compuerta de frames estáticos con la configuración actual"""
+        return StaticGate(
+            pixel_threshold=self.config['static_pixel_threshold'],
+            max_changed=self.config['static_max_changed'],
+            max_age=self.config['static_max_reuse_age']
+        )
+    
+    def run_detection(self, ctx, method):
+        """Correr el método o, si el frame no cambió, reutilizar el último resultado"""
+        # Los métodos de movimiento se recalculan siempre: sobre la máscara, que se evalúa igual
+        static = (self.config['static_gate'] and method not in self.UNGATED_METHODS
+                  and self.static_gate.check(ctx.gray, ctx.timestamp, key=method))
+        self.update_gate_stats()
+        
+        if static and self.gated_result is not None:
+            detected, results = self.gated_result
+            ctx.results.update(results)
+            
+            # El fondo sigue aprendiendo para que el movimiento no arranque de cero
+            self.detection_graph.evaluate('motion_mask', ctx)
+            return detected
+        
+        detected = self.detection_graph.run(method, ctx)
+        self.gated_result = (detected, dict(ctx.results))
+        return detected
+    
+    def update_gate_stats(self):
+        """Copiar los contadores de la compuerta a detection_data"""
+        self.detection_data['gate_hits'] = self.static_gate.hits
+        self.detection_data['gate_misses'] = self.static_gate.misses
+    
     def detection_loop(self):
         """Bucle principal optimizado"""
-        consecutive_errors = 0
-        max_errors = 10
+        grabber = self.grabber
+        last_seq = 0
         
         while self.is_monitoring:
             try:
-                ret, frame = self.cap.read()
-                if not ret:
-                    consecutive_errors += 1
-                    if consecutive_errors >= max_errors:
+                packet = grabber.read_latest(last_seq, timeout=1.0)
+                if packet is None:
+                    if grabber.failed:
                         break
-                    time.sleep(0.1)
                     continue
                 
-                consecutive_errors = 0
-                frame = cv2.flip(frame, 1)
-                self.current_frame = frame.copy()
+                last_seq = packet.seq
+                self.begin_frame()
+                self.detection_data['dropped_frames'] = grabber.dropped_frames
                 
-                # Detectar según método
-                detected = False
-                method = self.detection_method.get()
+                # Derivados del frame (gris, suavizados...) compartidos por todos los detectores,
+                # a la escala de procesamiento elegida por el control de resolución
+                ctx = self.build_frame_context(packet)
+                if ctx is None:
+                    continue
                 
-                if method == "face_only":
-                    detected = self.detect_face(frame)
-                    
-                elif method == "motion_only":
-                    detected = self.detect_motion(frame)
-                    
-                elif method == "shapes_only":
-                    detected = self.detect_phone_shapes_advanced(frame)
-                    
-                elif method == "hands_only":
-                    detected = self.detect_hands_optimized(frame)
-                    
-                elif method == "intelligent_flexible":
-                    detected = self.intelligent_detection_flexible(frame)
-                    
-                else:  # intelligent (legacy)
-                    detected = self.intelligent_detection(frame)
+                # Detectar según método (grafo de etapas; lo compartido corre una vez)
+                detected = self.analyze_frame(ctx, self.detection_method.get())
                 
                 self.process_detection(detected)
-                self.update_camera_display(frame)
-                
-                # Guardar frame para movimiento
-                self.last_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                time.sleep(0.05)
+                self.update_camera_display(ctx)
+                self.wait_next_frame(len(ctx.results.get('faces', [])), ctx.timestamp)
                 
             except Exception as e:
                 print(f"ERROR: {e}")
                 time.sleep(1)
     
-    def detect_face(self, frame):
-        """Detectar rostros mejorado"""
+    def process_loop(self):
+        """Bucle con la detección en otros procesos: acá solo se captura, se alerta y se muestra"""
+        grabber = self.grabber
+        last_seq = 0
+        shown = None
+        
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Aplicar ecualización de histograma para mejor detección
-            gray = cv2.equalizeHist(gray)
-            
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=self.config['face_sensitivity'],
-                minNeighbors=5,
-                minSize=self.config['min_face_size'],
-                maxSize=(300, 300)
-            )
+            while self.is_monitoring:
+                try:
+                    packet = grabber.read_latest(last_seq, timeout=1.0)
+                    if packet is None:
+                        if grabber.failed:
+                            break
+                        continue
+                    
+                    # Los procesos arrancan con el primer frame (el anillo toma su tamaño)
+                    pipeline = self.pipeline or self.start_pipeline(packet.frame.shape)
+                    if pipeline is None:
+                        print("INFO: Detección en el proceso principal")
+                        return self.detection_loop()
+                    
+                    last_seq = packet.seq
+                    self.begin_frame()
+                    if not pipeline.submit(packet.frame, packet.seq, packet.timestamp,
+                                           self.detection_method.get(), self.config):
+                        continue
+                    
+                    # Mientras se analiza este frame se muestra el anterior (su slot no se toca)
+                    if shown is not None:
+                        self.update_record_display(pipeline.view(shown.slot), shown)
+                    
+                    record = pipeline.wait_result(lambda: self.is_monitoring)
+                    if record is None:
+                        if self.is_monitoring:
+                            print("ERROR: Los procesos de detección terminaron; se sigue en el proceso principal")
+                            self.stop_pipeline()
+                            return self.detection_loop()
+                        break
+                    
+                    self.apply_record(record)
+                    shown = record
+                    self.wait_next_frame(len(record.results.get('faces', [])), record.timestamp)
+                    
+                except Exception as e:
+                    print(f"ERROR: {e}")
+                    time.sleep(1)
+        finally:
+            self.stop_pipeline()
+    
+    def start_pipeline(self, shape):
+        """Lanzar los procesos de detección para frames de `shape`; None si no arrancan"""
+        split = ()
+        if self.config['process_layout'] == 'split':
+            if self.config['shape_dirty_regions']:
+                print("INFO: Con shape_dirty_regions los candidatos dependen del movimiento; se usa 'worker'")
+            else:
+                split = self.PROCESS_SPLIT
+        pipeline = ProcessPipeline(type(self).headless, self.config, shape, split=split)
+        if not pipeline.start():
+            return None
+        with self.pipeline_lock:
+            self.pipeline = pipeline
+        return pipeline
+    
+    def stop_pipeline(self):
+        """Terminar los procesos de detección (desde el bucle o al cerrar la ventana)"""
+        with self.pipeline_lock:
+            pipeline, self.pipeline = self.pipeline, None
+        if pipeline is not None:
+            pipeline.stop()
+    
+    def apply_record(self, record):
+        """Resultado de un frame analizado en otro proceso"""
+        self.detection_data.update(record.data)
+        self.detection_data['dropped_frames'] = self.grabber.dropped_frames
+        self.detection_data['shed_overlay'] = self.frame_budget.shed.get('overlay', 0)
+        self.process_detection(record.detected)
+    
+    def begin_frame(self):
+        """Comenzar un frame: el otro juego de buffers y el presupuesto desde cero"""
+        self.buffers.next_frame()
+        self.frame_budget.budget_ms = self.config['frame_budget_ms']
+        self.frame_budget.start()
+    
+    def apply_settings(self, settings):
+        """Cambios de configuración hechos desde la GUI (en un proceso de detección)"""
+        self.config.update(settings)
+        for detector, stage in self.DETECTOR_STAGES.items():
+            if f'{detector}_rate' in settings or f'{detector}_max_staleness' in settings:
+                self.schedule.set_rate(stage, self.config[f'{detector}_rate'], self.config[f'{detector}_max_staleness'])
+    
+    def analyze_frame(self, ctx, method):
+        """Detección completa de un frame y sus mediciones (descartes, escala, actividad)"""
+        detected = self.run_detection(ctx, method)
+        
+        # Tras un cambio de escala el fondo y el seguimiento arrancan de cero: un False en esos
+        # frames es del reinicio, no de la escena, y cortaría la sesión de uso en curso
+        if self.scale_settle > 0:
+            self.scale_settle -= 1
+            detected = detected or self.last_decision
+        self.last_decision = detected
+        
+        self.update_shed_stats()
+        self.update_processing_scale()
+        if self.config['adaptive_rate']:
+            self.measure_activity(ctx)
+        
+        # Para el overlay, que puede dibujarse en otro proceso
+        self.detection_data['stage_ms'] = dict(self.detection_graph.timings)
+        self.detection_data['stage_hz'] = self.schedule.rates()
+        return detected
+    
+    def wait_next_frame(self, faces_count, timestamp):
+        """Esperar hasta el próximo frame según el ritmo elegido"""
+        if self.config['adaptive_rate']:
+            self.update_capture_rate(faces_count, timestamp)
+            time.sleep(self.activity_rate.sleep_time(self.frame_budget.elapsed_ms() / 1000))
+        else:
+            time.sleep(0.05)
+    
+    def frame_context(self, frame, seq, timestamp):
+        """Contexto de un frame BGR ya espejado, a la escala de procesamiento"""
+        return FrameContext(self.resolution.resize(frame, self.buffers), seq, timestamp,
+                            source=frame, buffers=self.buffers)
+    
+    def build_frame_context(self, packet):
+        """Contexto del frame espejado; con captura cruda, gris directo y color bajo demanda.
+
+        Espejado, reducción y derivados se escriben en los buffers del frame (sin copias nuevas);
+        el frame anterior sigue intacto en el otro juego de buffers.
+        """
+        buffers = self.buffers
+        if self.raw_decoder is None:
+            frame = cv2.flip(packet.frame, 1, dst=buffers.like('mirror', packet.frame))
+            self.current_frame = frame
+            return self.frame_context(frame, packet.seq, packet.timestamp)
+        
+        raw = packet.frame
+        gray = self.raw_decoder.gray(raw, buffers)
+        if gray is None:
+            print("ERROR: Frame crudo inválido")
+            return None
+        
+        small = self.resolution.resize(gray, buffers)
+        size = (small.shape[1], small.shape[0])
+        return FrameContext(None, packet.seq, packet.timestamp, source=gray, gray=small,
+                            color=lambda: self.raw_decoder.color(raw, size, buffers), buffers=buffers)
+    
+    def update_shed_stats(self):
+        """Copiar los descartes por presupuesto a detection_data"""
+        shed = self.frame_budget.shed
+        self.detection_data['shed_shapes'] = shed.get(self.DETECTOR_STAGES['shapes'], 0)
+        self.detection_data['shed_hands'] = shed.get(self.DETECTOR_STAGES['hands'], 0)
+        self.detection_data['shed_overlay'] = shed.get('overlay', 0)
+    
+    def reset_frame_state(self):
+        """Olvidar todo lo que depende de frames anteriores (fondo, seguimiento, resultados)"""
+        self.last_faces = None
+        self.face_tracker = self.create_face_tracker()
+        self.face_search.reset()
+        self.motion_model = self.create_motion_model()
+        self.static_gate.reset()
+        self.gated_result = None
+        self.fovea_cache = None
+        self.schedule.reset()
+    
+    def create_resolution_scaler(self):
+        """Crear el control de escala con la configuración actual"""
+        return ResolutionScaler(
+            scales=self.config['processing_scales'],
+            target_ms=self.config['processing_target_ms'],
+            reference_width=self.config['processing_width']
+        )
+    
+    def update_processing_scale(self):
+        """Ajustar la escala de procesamiento al tiempo que tomó este frame"""
+        if not self.config['resolution_scaling']:
+            if self.resolution.scale != 1.0:
+                self.resolution.reset()
+                self.reset_frame_state()
+            return
+        
+        if self.resolution.update(self.frame_budget.elapsed_ms()):
+            # Fondo, seguimiento y resultados guardados quedaron en la escala anterior
+            self.reset_frame_state()
+            self.scale_settle = self.resolution.warmup_frames
+            print(f"INFO: Escala de procesamiento {self.resolution.scale:.2f}")
+        self.detection_data['processing_scale'] = self.resolution.scale
+    
+    def create_activity_rate(self):
+        """Crear el control de ritmo con la configuración actual"""
+        return ActivityRate(
+            idle_fps=self.config['idle_fps'],
+            motion_fps=self.config['motion_fps'],
+            active_fps=self.config['active_fps'],
+            motion_threshold=self.config['idle_motion_threshold'],
+            idle_delay=self.config['idle_delay']
+        )
+    
+    def measure_activity(self, ctx):
+        """Nivel de movimiento para el ritmo de captura"""
+        # Se mide siempre, lo use o no el método elegido
+        mask = self.detection_graph.evaluate('motion_mask', ctx)
+        motion_level = cv2.countNonZero(mask) * 100.0 / mask.size if mask is not None else 0.0
+        self.detection_data['activity_motion'] = motion_level
+    
+    def update_capture_rate(self, faces_count, timestamp):
+        """Elegir el ritmo del próximo frame según rostros, movimiento y sesión"""
+        previous = self.activity_rate.level
+        level = self.activity_rate.update(faces_count, self.detection_data['activity_motion'],
+                                          self.detection_start_time is not None, timestamp)
+        self.detection_data['capture_rate'] = level
+        
+        # La cámara también baja su ritmo donde el backend lo permite
+        if level != previous and self.grabber:
+            self.grabber.set_fps(self.activity_rate.fps)
+    
+    def create_face_tracker(self):
+        """Crear el seguidor de rostros con la configuración actual"""
+        return FaceTracker(
+            redetect_interval=self.config['face_redetect_interval'],
+            min_points=self.config['tracker_min_points'],
+            min_confidence=self.config['tracker_min_confidence']
+        )
+    
+    def run_face_cascade(self, ctx):
+        """Detección Haar: ventana alrededor del último rostro o frame completo"""
+        hint = self.last_faces if self.config['face_roi_search'] else None
+        
+        # Parámetros canónicos, compartidos por detectores y overlays
+        return self.face_search.detect(
+            ctx.equalized,  # Ecualización de histograma para mejor detección
+            scale_factor=self.config['face_sensitivity'],
+            min_neighbors=5,
+            min_size=self.resolution.size(self.config['min_face_size']),
+            max_size=self.resolution.size((300, 300)),
+            hint=hint
+        )
+    
+    def get_faces(self, ctx):
+        """Rostros del frame: el cascade corre una sola vez por contexto"""
+        def compute():
+            if self.config['face_tracking']:
+                # Cascade cada N frames o al perder el seguimiento; entre medio, flujo óptico
+                faces = self.face_tracker.update(ctx.gray, lambda: self.run_face_cascade(ctx))
+            else:
+                faces = self.run_face_cascade(ctx)
             
+            # Pista para la búsqueda restringida del próximo frame
+            self.last_faces = faces
+            ctx.results['faces'] = faces_to_detections(faces)
+            return faces
+        
+        return ctx.cached('faces', compute)
+    
+    def detect_face(self, ctx, faces):
+        """Detectar rostros mejorado"""
+        try:
             self.detection_data['faces_count'] = len(faces)
             return len(faces) > 0
             
@@ -485,93 +953,56 @@ class OptimizedPhoneDetector:
             print(f"ERROR face detection: {e}")
             return False
     
-    def detect_motion(self, frame):
+    def create_motion_model(self):
+        """Crear el modelo de fondo con la configuración actual"""
+        return MotionModel(
+            mode=self.config['motion_model'],
+            learning_rate=self.config['motion_learning_rate'],
+            threshold=self.config['motion_threshold'],
+            # En reposo llega un frame cada 1/idle_fps s: con margen, eso no es un hueco
+            max_gap=max(1.0, 2.0 / self.config['idle_fps'])
+        )
+    
+    def get_motion_mask(self, ctx):
+        """Máscara de primer plano del frame (None mientras no haya fondo)"""
+        # El modelo se actualiza una sola vez por frame, lo pida quien lo pida
+        return ctx.cached('motion_mask', lambda: self.motion_model.apply(ctx.blurred(21), ctx.timestamp))
+    
+    def region_motion(self, ctx, rx, ry, rw, rh):
+        """Fracción de píxeles en movimiento dentro del rectángulo (None sin fondo)"""
+        if self.detection_graph.evaluate('motion_mask', ctx) is None:
+            return None
+        # Cuatro lecturas de la imagen integral de la máscara, sin importar el tamaño
+        return self.motion_model.region_fraction(rx, ry, rw, rh)
+    
+    def detect_motion(self, ctx, mask):
         """Detectar movimiento optimizado"""
         try:
-            if self.last_frame is None:
+            if mask is None:
                 return False
             
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.GaussianBlur(gray, (21, 21), 0)
-            
-            diff = cv2.absdiff(self.last_frame, gray)
-            _, thresh = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)
-            
-            # Operaciones morfológicas para limpiar
-            kernel = np.ones((5,5), np.uint8)
-            thresh = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
-            thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-            
-            motion_pixels = cv2.countNonZero(thresh)
-            motion_percentage = (motion_pixels / (frame.shape[0] * frame.shape[1])) * 100
+            motion_pixels = cv2.countNonZero(mask)
+            motion_percentage = (motion_pixels / (ctx.shape[0] * ctx.shape[1])) * 100
             
             self.detection_data['motion_level'] = motion_percentage
-            return motion_pixels > self.config['motion_sensitivity']
+            return motion_pixels > self.resolution.area(self.config['motion_sensitivity'])
             
         except Exception as e:
             print(f"ERROR motion detection: {e}")
             return False
     
-    def detect_phone_shapes_advanced(self, frame):
+    def get_phones(self, ctx, motion_mask=None):
+        """Candidatos a celular del frame como lista de Detection (puntaje = solidez)"""
+        return ctx.cached('phones', lambda: candidates_to_detections(self.find_phone_candidates(ctx, motion_mask)))
+    
+    def detect_phone_shapes_advanced(self, ctx, phone_candidates, faces):
         """Detección avanzada de formas rectangulares"""
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            
-            # Preprocesamiento mejorado
-            gray = cv2.bilateralFilter(gray, 9, 75, 75)
+            # En modo foveado, los candidatos del frame reducido se confirman a resolución completa
+            if self.config['foveated'] and ctx.source_scale > 1.0:
+                phone_candidates = self.verify_in_fovea(ctx, phone_candidates, faces)
             
-            # Detección de bordes adaptativa
-            edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                        cv2.THRESH_BINARY, 11, 2)
-            
-            # También usar Canny
-            canny = cv2.Canny(gray, self.config['canny_low'], self.config['canny_high'])
-            
-            # Combinar ambos métodos
-            combined = cv2.bitwise_or(edges, canny)
-            
-            # Operaciones morfológicas
-            kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-            combined = cv2.morphologyEx(combined, cv2.MORPH_CLOSE, kernel)
-            
-            contours, _ = cv2.findContours(combined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            phone_candidates = []
-            
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                
-                if area < self.config['phone_min_area'] or area > self.config['phone_max_area']:
-                    continue
-                
-                # Calcular solidez (área / área del casco convexo)
-                hull = cv2.convexHull(contour)
-                hull_area = cv2.contourArea(hull)
-                if hull_area == 0:
-                    continue
-                    
-                solidity = area / hull_area
-                
-                if solidity < self.config['min_contour_solidity']:
-                    continue
-                
-                # Aproximar a rectángulo
-                epsilon = 0.02 * cv2.arcLength(contour, True)
-                approx = cv2.approxPolyDP(contour, epsilon, True)
-                
-                if len(approx) >= 4:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    aspect_ratio = max(w, h) / min(w, h)
-                    
-                    # Proporción típica de celular más flexible
-                    if 1.2 <= aspect_ratio <= 3.5:
-                        phone_candidates.append({
-                            'x': x, 'y': y, 'w': w, 'h': h,
-                            'area': area,
-                            'aspect_ratio': aspect_ratio,
-                            'solidity': solidity,
-                            'center': (x + w//2, y + h//2)
-                        })
+            ctx.results['phones'] = phone_candidates
             
             self.detection_data['phone_candidates'] = len(phone_candidates)
             return len(phone_candidates) > 0
@@ -580,13 +1011,71 @@ class OptimizedPhoneDetector:
             print(f"ERROR shape detection: {e}")
             return False
     
-    def detect_hand_regions(self, frame, faces):
+    def verify_in_fovea(self, ctx, phone_candidates, faces):
+        """Buscar celulares a resolución de captura alrededor de los candidatos y los rostros"""
+        # Mientras los candidatos sean los mismos (etapa reutilizada), la verificación también;
+        # el reemplazo de una etapa descartada es un objeto compartido y no identifica a un frame
+        shed = phone_candidates is self.detection_graph.fallbacks.get('phones')
+        if not shed and self.fovea_cache is not None and self.fovea_cache[0] is phone_candidates:
+            return self.fovea_cache[1]
+        
+        height, width = ctx.shape[:2]
+        boxes = []
+        for box, margin in ([(c, self.config['fovea_padding']) for c in phone_candidates]
+                            + [(f, self.config['fovea_face_expand']) for f in faces()]):
+            x, y, w, h = box[:4]
+            pad_x, pad_y = int(w * margin), int(h * margin)
+            x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+            x1, y1 = min(width, x + w + pad_x), min(height, y + h + pad_y)
+            if x1 > x0 and y1 > y0:
+                boxes.append((x0, y0, x1 - x0, y1 - y0))
+        
+        verified = []
+        if boxes:
+            # Un celular lejano cerca del rostro puede quedar bajo el mínimo del frame reducido
+            min_area = self.resolution.area(self.config['phone_min_area']) * self.config['fovea_min_area_factor']
+            candidates = foveal_phone_candidates(ctx, merge_rectangles(boxes), min_area,
+                                                 self.resolution.area(self.config['phone_max_area']),
+                                                 self.config['min_contour_solidity'],
+                                                 self.config['canny_low'], self.config['canny_high'])
+            verified = candidates_to_detections(candidates)
+        
+        self.fovea_cache = None if shed else (phone_candidates, verified)
+        return verified
+    
+    def find_phone_candidates(self, ctx, motion_mask=None):
+        """Candidatos a celular como array estructurado (PHONE_CANDIDATE_DTYPE); `motion_mask` es perezosa"""
+        regions = self.get_dirty_regions(ctx, motion_mask()) if motion_mask is not None else None
+        return extract_phone_candidates(ctx, self.resolution.area(self.config['phone_min_area']),
+                                        self.resolution.area(self.config['phone_max_area']),
+                                        self.config['min_contour_solidity'],
+                                        self.config['canny_low'], self.config['canny_high'],
+                                        mode=self.config['shape_preprocessing'], regions=regions)
+    
+    def get_dirty_regions(self, ctx, motion_mask):
+        """Zonas en movimiento (ampliadas y fusionadas) donde buscar formas; None = frame completo"""
+        if motion_mask is None:
+            self.detection_data['dirty_fraction'] = 1.0
+            return None
+        
+        regions = self.motion_model.dirty_rectangles(int(self.resolution.length(self.config['dirty_padding'])),
+                                                     self.resolution.area(self.config['dirty_min_area']))
+        
+        # Con mucho movimiento, varios recortes cuestan más que el frame entero
+        fraction = sum(w * h for (_, _, w, h) in regions) / float(ctx.shape[0] * ctx.shape[1])
+        if fraction > self.config['dirty_max_fraction']:
+            self.detection_data['dirty_fraction'] = 1.0
+            return None
+        
+        self.detection_data['dirty_fraction'] = fraction
+        return regions
+    
+    def detect_hand_regions(self, ctx, faces):
         """Detectar regiones probables de manos basado en posición facial"""
         try:
             if len(faces) == 0:
                 return []
             
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             hand_regions = []
             
             for (face_x, face_y, face_w, face_h) in faces:
@@ -597,38 +1086,29 @@ class OptimizedPhoneDetector:
                 # Regiones típicas de manos al usar celular
                 regions = [
                     # Frente al rostro
-                    (face_center_x - face_w//2, face_y - face_h//3, face_w, face_h//2),
+                    (face_center_x - face_w//2, face_y - face_h//3, face_w, face_h//2, "FRENTE"),
                     # Lado derecho
-                    (face_x + face_w, face_center_y - face_h//3, face_w//2, face_h//2),
+                    (face_x + face_w, face_center_y - face_h//3, face_w//2, face_h//2, "DERECHA"),
                     # Lado izquierdo  
-                    (face_x - face_w//2, face_center_y - face_h//3, face_w//2, face_h//2),
+                    (face_x - face_w//2, face_center_y - face_h//3, face_w//2, face_h//2, "IZQUIERDA"),
                 ]
                 
-                for (rx, ry, rw, rh) in regions:
+                for (rx, ry, rw, rh, label) in regions:
                     # Asegurar que la región esté dentro del frame
                     rx = max(0, rx)
                     ry = max(0, ry)
-                    rw = min(rw, frame.shape[1] - rx)
-                    rh = min(rh, frame.shape[0] - ry)
+                    rw = min(rw, ctx.shape[1] - rx)
+                    rh = min(rh, ctx.shape[0] - ry)
                     
                     if rw > 20 and rh > 20:
-                        roi = gray[ry:ry+rh, rx:rx+rw]
-                        
                         # Detectar movimiento en la región
-                        if hasattr(self, 'last_frame') and self.last_frame is not None:
-                            last_roi = self.last_frame[ry:ry+rh, rx:rx+rw]
-                            diff = cv2.absdiff(roi, last_roi)
-                            _, thresh = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
-                            movement = cv2.countNonZero(thresh)
-                            
-                            # Si hay suficiente movimiento, considerar como posible mano
-                            if movement > (rw * rh * 0.1):  # 10% de la región
-                                hand_regions.append({
-                                    'x': rx, 'y': ry, 'w': rw, 'h': rh,
-                                    'movement': movement,
-                                    'center': (rx + rw//2, ry + rh//2)
-                                })
+                        movement = self.region_motion(ctx, rx, ry, rw, rh)
+                        
+                        # Si hay suficiente movimiento, considerar como posible mano
+                        if movement is not None and movement > 0.1:  # 10% de la región
+                            hand_regions.append(Detection(rx, ry, rw, rh, movement, label))
             
+            ctx.results['hand_regions'] = hand_regions
             self.detection_data['hand_regions'] = len(hand_regions)
             return hand_regions
             
@@ -636,40 +1116,31 @@ class OptimizedPhoneDetector:
             print(f"ERROR hand regions: {e}")
             return []
     
-    def intelligent_detection(self, frame):
+    def intelligent_detection(self, ctx, face_detected, faces, shapes, hand_regions):
         """Detección inteligente combinada"""
         try:
-            # 1. Detectar rostros
-            face_detected = self.detect_face(frame)
-            
+            # 1. Sin rostro no hace falta nada más
             if not face_detected:
                 self.debug_info = "Sin rostros detectados"
                 return False
             
-            # 2. Obtener rostros para análisis
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray, scaleFactor=self.config['face_sensitivity'],
-                minNeighbors=5, minSize=self.config['min_face_size']
-            )
+            # 2. Detectar formas de celular
+            phone_shapes = shapes()
             
-            # 3. Detectar formas de celular
-            phone_shapes = self.detect_phone_shapes_advanced(frame)
+            # 3. Detectar regiones de manos
+            hand_regions = hand_regions()
             
-            # 4. Detectar regiones de manos
-            hand_regions = self.detect_hand_regions(frame, faces)
-            
-            # 5. Verificar proximidad
+            # 4. Verificar proximidad
             phone_near_face = False
             hands_near_face = False
             
             if phone_shapes:
-                phone_near_face = self.check_proximity_to_face(frame, faces, "phone")
+                phone_near_face = self.check_proximity_to_face(ctx, faces, "phone")
             
             if hand_regions:
-                hands_near_face = self.check_proximity_to_face(frame, faces, "hands")
+                hands_near_face = self.check_proximity_to_face(ctx, faces, "hands")
             
-            # 6. Lógica de detección inteligente
+            # 5. Lógica de detección inteligente
             # Detectar si hay rostro Y (celular cerca O manos activas cerca)
             detected = face_detected and (phone_near_face or hands_near_face)
             
@@ -683,38 +1154,32 @@ class OptimizedPhoneDetector:
             self.debug_info = f"Error: {str(e)[:30]}"
             return False
     
-    def detect_hands_optimized(self, frame):
+    def detect_hands_optimized(self, ctx, faces, hand_regions):
         """Detección optimizada solo de manos"""
         try:
-            # 1. Detectar rostros para definir regiones
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray, scaleFactor=self.config['face_sensitivity'],
-                minNeighbors=5, minSize=self.config['min_face_size']
-            )
-            
+            # 1. Los rostros definen las regiones
             self.detection_data['faces_count'] = len(faces)
             
             # Si no hay rostros, usar regiones generales
             if len(faces) == 0:
                 # Detectar movimiento en regiones típicas de manos
-                h, w = frame.shape[:2]
+                h, w = ctx.shape[:2]
                 general_regions = [
                     (w//4, h//4, w//2, h//2, "CENTRO"),
                     (0, h//3, w//3, h//3, "IZQUIERDA"),
                     (2*w//3, h//3, w//3, h//3, "DERECHA"),
                 ]
-                hand_activity = self.check_hand_activity_in_regions(frame, general_regions)
+                hand_activity = self.check_hand_activity_in_regions(ctx, general_regions)
                 self.debug_info = f"Sin rostro - Actividad manos: {hand_activity}"
                 return hand_activity > 0
             
             # 2. Detectar actividad de manos en regiones faciales
-            hand_regions = self.detect_hand_regions(frame, faces)
+            hand_regions = hand_regions()
             hands_detected = len(hand_regions) > 0
             
             # 3. También verificar movimiento general en área superior
-            h, w = frame.shape[:2]
-            upper_region_movement = self.detect_movement_in_region(frame, (0, 0, w, h//2))
+            h, w = ctx.shape[:2]
+            upper_region_movement = self.detect_movement_in_region(ctx, (0, 0, w, h//2))
             
             # 4. Combinar detecciones
             detected = hands_detected or upper_region_movement
@@ -729,27 +1194,23 @@ class OptimizedPhoneDetector:
             self.debug_info = f"Error manos: {str(e)[:20]}"
             return False
     
-    def intelligent_detection_flexible(self, frame):
-        """Detección inteligente más flexible - Cara O Manos"""
+    def intelligent_detection_flexible(self, ctx, face, hands, shapes, motion):
+        """Detección inteligente más flexible - Cara O Manos O (Formas y Movimiento)"""
         try:
-            # 1. Detectar rostros
-            face_detected = self.detect_face(frame)
-            
-            # 2. Detectar manos
-            hands_detected = self.detect_hands_optimized(frame)
-            
-            # 3. Detectar formas (opcional)
-            phone_shapes = self.detect_phone_shapes_advanced(frame)
-            
-            # 4. Lógica flexible: Cara O Manos O (Formas y Movimiento)
-            movement_detected = self.detect_motion(frame)
+            # Cada término se evalúa solo si hace falta, del más barato al más caro
+            stages = {'face': face, 'hands': hands, 'shapes': shapes, 'motion': motion}
+            launched = self.detection_graph.launched_with('intelligent_flexible')
+            detected = self.fusion.decide(('or', 'face', 'hands', ('and', 'shapes', 'motion')), stages, launched)
             
-            detected = (face_detected or 
-                       hands_detected or 
-                       (phone_shapes and movement_detected))
+            for name, count in self.fusion.skips.items():
+                self.detection_data[f'skipped_{name}'] = count
+            for name, count in self.fusion.unused.items():
+                self.detection_data[f'unused_{name}'] = count
             
-            # Debug info
-            self.debug_info = f"Cara:{'✓' if face_detected else '✗'} Manos:{'✓' if hands_detected else '✗'} Mov:{'✓' if movement_detected else '✗'}"
+            # Debug info ('-' = no evaluado en este frame)
+            values = self.fusion.values
+            marks = {name: ('✓' if values[name] else '✗') if name in values else '-' for name in stages}
+            self.debug_info = f"Cara:{marks['face']} Manos:{marks['hands']} Mov:{marks['motion']}"
             
             return detected
             
@@ -758,29 +1219,18 @@ class OptimizedPhoneDetector:
             self.debug_info = f"Error flex: {str(e)[:20]}"
             return False
     
-    def check_hand_activity_in_regions(self, frame, regions):
+    def check_hand_activity_in_regions(self, ctx, regions):
         """Verificar actividad de manos en regiones específicas"""
         try:
-            if not hasattr(self, 'last_frame') or self.last_frame is None:
+            if self.detection_graph.evaluate('motion_mask', ctx) is None:
                 return 0
             
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             active_regions = 0
             
             for (rx, ry, rw, rh, label) in regions:
-                if rx + rw <= gray.shape[1] and ry + rh <= gray.shape[0]:
-                    roi = gray[ry:ry+rh, rx:rx+rw]
-                    last_roi = self.last_frame[ry:ry+rh, rx:rx+rw]
-                    
-                    diff = cv2.absdiff(roi, last_roi)
-                    _, thresh = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)
-                    
-                    # Aplicar filtros morfológicos para limpiar ruido
-                    kernel = np.ones((3,3), np.uint8)
-                    thresh = cv2.morphologyEx(thresh, cv2.MORPH_OPEN, kernel)
-                    
-                    movement = cv2.countNonZero(thresh)
-                    movement_percentage = (movement / (rw * rh)) * 100
+                if rx + rw <= ctx.shape[1] and ry + rh <= ctx.shape[0]:
+                    # La máscara compartida ya viene limpia de ruido
+                    movement_percentage = self.region_motion(ctx, rx, ry, rw, rh) * 100
                     
                     # Si hay suficiente movimiento (más del 5%)
                     if movement_percentage > 5:
@@ -792,32 +1242,22 @@ class OptimizedPhoneDetector:
             print(f"ERROR hand activity: {e}")
             return 0
     
-    def detect_movement_in_region(self, frame, region):
+    def detect_movement_in_region(self, ctx, region):
         """Detectar movimiento en región específica"""
         try:
-            if not hasattr(self, 'last_frame') or self.last_frame is None:
-                return False
-            
             rx, ry, rw, rh = region
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
             
             # Asegurar que la región esté dentro del frame
             rx = max(0, rx)
             ry = max(0, ry)
-            rw = min(rw, gray.shape[1] - rx)
-            rh = min(rh, gray.shape[0] - ry)
+            rw = min(rw, ctx.shape[1] - rx)
+            rh = min(rh, ctx.shape[0] - ry)
             
-            if rw <= 0 or rh <= 0:
+            movement = self.region_motion(ctx, rx, ry, rw, rh)
+            if movement is None:
                 return False
             
-            roi = gray[ry:ry+rh, rx:rx+rw]
-            last_roi = self.last_frame[ry:ry+rh, rx:rx+rw]
-            
-            diff = cv2.absdiff(roi, last_roi)
-            _, thresh = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
-            
-            movement = cv2.countNonZero(thresh)
-            movement_percentage = (movement / (rw * rh)) * 100
+            movement_percentage = movement * 100
             
             return movement_percentage > 8  # 8% de la región
             
@@ -825,17 +1265,16 @@ class OptimizedPhoneDetector:
             print(f"ERROR movement region: {e}")
             return False
     
-    def check_proximity_to_face(self, frame, faces, detection_type):
+    def check_proximity_to_face(self, ctx, faces, detection_type):
         """Verificar proximidad a la cara"""
         try:
-            threshold = self.config['phone_distance_threshold']
+            threshold = self.resolution.length(self.config['phone_distance_threshold'])
             
             for (face_x, face_y, face_w, face_h) in faces:
                 face_center = (face_x + face_w//2, face_y + face_h//2)
                 
                 if detection_type == "phone":
                     # Verificar candidatos de celular
-                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
                     # Reutilizar lógica de detección de formas
                     # (simplificado para este ejemplo)
                     return self.detection_data['phone_candidates'] > 0
@@ -850,44 +1289,68 @@ class OptimizedPhoneDetector:
             print(f"ERROR proximity check: {e}")
             return False
     
-    def update_camera_display(self, frame):
+    def update_camera_display(self, ctx):
         """Actualizar display con visualizaciones"""
         if not self.show_camera:
             return
         
         try:
-            display_frame = frame.copy()
-            
-            # Dibujar detecciones
-            self.draw_face_detection(display_frame)
-            self.draw_phone_detection(display_frame)
-            self.draw_hand_regions(display_frame)
-            self.draw_debug_overlay(display_frame)
-            
-            # Redimensionar
-            display_frame = cv2.resize(display_frame, (400, 300))
-            
-            # Convertir a tkinter
-            display_frame_rgb = cv2.cvtColor(display_frame, cv2.COLOR_BGR2RGB)
-            image = Image.fromarray(display_frame_rgb)
-            photo = ImageTk.PhotoImage(image)
-            
-            self.camera_label.config(image=photo, text='')
-            self.camera_label.image = photo
-            
+            self.show_camera_image(self.render_camera_frame(ctx))
+        except Exception as e:
+            print(f"ERROR updating display: {e}")
+    
+    def update_record_display(self, frame, record):
+        """Actualizar display con un frame analizado en otro proceso (`frame` es su slot compartido)"""
+        if not self.show_camera:
+            return
+        
+        try:
+            self.show_camera_image(self.render_view(frame, record.results, record.scale))
         except Exception as e:
             print(f"ERROR updating display: {e}")
     
-    def draw_face_detection(self, frame):
+    def show_camera_image(self, rgb):
+        """Mostrar una imagen RGB en la etiqueta de la cámara"""
+        # Convertir a tkinter
+        image = Image.fromarray(rgb)
+        photo = ImageTk.PhotoImage(image)
+        
+        self.camera_label.config(image=photo, text='')
+        self.camera_label.image = photo
+    
+    def render_camera_frame(self, ctx):
+        """Vista de cámara anotada del contexto: RGB de 400x300 en los buffers del frame"""
+        # Se dibuja sobre el frame de captura (las cajas vuelven a su escala); con
+        # captura cruda la fuente es gris y el color se decodifica a escala de proceso
+        if ctx.source.ndim == 3:
+            return self.render_view(ctx.source, ctx.results, ctx.source_scale)
+        return self.render_view(ctx.frame, ctx.results, 1.0)
+    
+    def render_view(self, frame, results, factor=1.0):
+        """Copia de `frame` con `results` (escalados por `factor`) dibujados, en RGB de 400x300"""
+        buffers = self.buffers
+        display_frame = buffers.copy('display', frame)
+        
+        # Dibujar solo lo que los detectores ya calcularon en este frame;
+        # si el frame ya se pasó del presupuesto, se muestra sin anotaciones
+        self.frame_budget.run('overlay', lambda: self.draw_overlays(display_frame, results, factor))
+        
+        # Redimensionar y pasar a RGB
+        small = cv2.resize(display_frame, (400, 300), dst=buffers.get('display_small', (300, 400, 3)))
+        return cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=buffers.get('display_rgb', (300, 400, 3)))
+    
+    def draw_overlays(self, frame, results, factor=1.0):
+        """Dibujar detecciones (escaladas por `factor`) y debug sobre el frame"""
+        self.draw_face_detection(frame, scale_detections(results.get('faces', []), factor))
+        self.draw_phone_detection(frame, scale_detections(results.get('phones', []), factor))
+        self.draw_hand_regions(frame, scale_detections(results.get('hand_regions', []), factor))
+        self.draw_debug_overlay(frame)
+    
+    def draw_face_detection(self, frame, faces):
         """Dibujar detección de rostros"""
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray, scaleFactor=self.config['face_sensitivity'],
-                minNeighbors=5, minSize=self.config['min_face_size']
-            )
-            
-            for (x, y, w, h) in faces:
+            for face in faces:
+                x, y, w, h = face.x, face.y, face.w, face.h
                 cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 3)
                 cv2.putText(frame, f'ROSTRO', (x, y-10), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
@@ -895,87 +1358,26 @@ class OptimizedPhoneDetector:
         except Exception as e:
             print(f"ERROR drawing faces: {e}")
     
-    def draw_phone_detection(self, frame):
+    def draw_phone_detection(self, frame, phones):
         """Dibujar detección de celulares"""
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.bilateralFilter(gray, 9, 75, 75)
-            
-            edges = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
-                                        cv2.THRESH_BINARY, 11, 2)
-            canny = cv2.Canny(gray, self.config['canny_low'], self.config['canny_high'])
-            combined = cv2.bitwise_or(edges, canny)
-            
-            contours, _ = cv2.findContours(combined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                
-                if area < self.config['phone_min_area'] or area > self.config['phone_max_area']:
-                    continue
-                
-                hull = cv2.convexHull(contour)
-                hull_area = cv2.contourArea(hull)
-                if hull_area == 0:
-                    continue
-                    
-                solidity = area / hull_area
-                if solidity < self.config['min_contour_solidity']:
-                    continue
-                
-                epsilon = 0.02 * cv2.arcLength(contour, True)
-                approx = cv2.approxPolyDP(contour, epsilon, True)
-                
-                if len(approx) >= 4:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    aspect_ratio = max(w, h) / min(w, h)
-                    
-                    if 1.2 <= aspect_ratio <= 3.5:
-                        cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
-                        cv2.putText(frame, f'CELULAR {aspect_ratio:.1f}', (x, y-10), 
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+            for phone in phones:
+                x, y, w, h = phone.x, phone.y, phone.w, phone.h
+                cv2.rectangle(frame, (x, y), (x+w, y+h), (255, 0, 0), 2)
+                cv2.putText(frame, f'CELULAR {phone.aspect_ratio:.1f}', (x, y-10), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
                 
         except Exception as e:
             print(f"ERROR drawing phones: {e}")
     
-    def draw_hand_regions(self, frame):
+    def draw_hand_regions(self, frame, hand_regions):
         """Dibujar regiones de manos"""
         try:
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = self.face_cascade.detectMultiScale(
-                gray, scaleFactor=self.config['face_sensitivity'],
-                minNeighbors=5, minSize=self.config['min_face_size']
-            )
-            
-            for (face_x, face_y, face_w, face_h) in faces:
-                face_center_x = face_x + face_w // 2
-                face_center_y = face_y + face_h // 2
-                
-                regions = [
-                    (face_center_x - face_w//2, face_y - face_h//3, face_w, face_h//2, "FRENTE"),
-                    (face_x + face_w, face_center_y - face_h//3, face_w//2, face_h//2, "DERECHA"),
-                    (face_x - face_w//2, face_center_y - face_h//3, face_w//2, face_h//2, "IZQUIERDA"),
-                ]
-                
-                for (rx, ry, rw, rh, label) in regions:
-                    rx = max(0, rx)
-                    ry = max(0, ry)
-                    rw = min(rw, frame.shape[1] - rx)
-                    rh = min(rh, frame.shape[0] - ry)
-                    
-                    if rw > 20 and rh > 20:
-                        # Verificar actividad en la región
-                        if hasattr(self, 'last_frame') and self.last_frame is not None:
-                            roi = gray[ry:ry+rh, rx:rx+rw]
-                            last_roi = self.last_frame[ry:ry+rh, rx:rx+rw]
-                            diff = cv2.absdiff(roi, last_roi)
-                            _, thresh = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
-                            movement = cv2.countNonZero(thresh)
-                            
-                            if movement > (rw * rh * 0.1):
-                                cv2.rectangle(frame, (rx, ry), (rx+rw, ry+rh), (255, 255, 0), 2)
-                                cv2.putText(frame, f'MANO {label}', (rx, ry-5), 
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1)
+            for region in hand_regions:
+                rx, ry, rw, rh = region.x, region.y, region.w, region.h
+                cv2.rectangle(frame, (rx, ry), (rx+rw, ry+rh), (255, 255, 0), 2)
+                cv2.putText(frame, f'MANO {region.label}', (rx, ry-5), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1)
                 
         except Exception as e:
             print(f"ERROR drawing hands: {e}")
@@ -985,19 +1387,34 @@ class OptimizedPhoneDetector:
         try:
             h, w = frame.shape[:2]
             
-            # Fondo para información
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (10, 10), (w-10, 100), (0, 0, 0), -1)
-            cv2.addWeighted(overlay, 0.7, frame, 0.3, 0, frame)
+            # Fondo para información: el recuadro se oscurece in situ (mezcla 70% con negro)
+            panel = frame[10:161, 10:w-9]
+            cv2.convertScaleAbs(panel, dst=panel, alpha=0.3)
             
             # Información de detección
             y_offset = 30
             info_lines = [
-                f"Metodo: {self.detection_method.get()}",
+                f"Metodo: {self.detection_method.get()} | Ritmo: {self.detection_data['capture_rate']} ({self.activity_rate.fps} fps)"
+                f" | Escala: {self.detection_data['processing_scale']:.2f}",
                 f"Caras: {self.detection_data['faces_count']} | Celulares: {self.detection_data['phone_candidates']}",
                 f"Regiones mano: {self.detection_data['hand_regions']} | Movimiento: {self.detection_data['motion_level']:.1f}%",
             ]
             
+            # Etapas más costosas (tiempo propio medido por el grafo)
+            timings = sorted(self.detection_data['stage_ms'].items(), key=lambda item: -item[1])[:4]
+            if timings:
+                info_lines.append("ms: " + " | ".join(f"{name} {ms:.1f}" for name, ms in timings))
+            
+            # Frecuencia efectiva de cada detector programado
+            rates = self.detection_data['stage_hz']
+            info_lines.append("Hz: " + " | ".join(f"{detector} {rates.get(stage, 0.0):.1f}"
+                                                 for detector, stage in self.DETECTOR_STAGES.items()))
+            
+            # Etapas descartadas por presupuesto desde el inicio
+            info_lines.append(f"Descartes: formas {self.detection_data['shed_shapes']} | "
+                              f"manos {self.detection_data['shed_hands']} | "
+                              f"overlay {self.detection_data['shed_overlay']}")
+            
             for line in info_lines:
                 cv2.putText(frame, line, (15, y_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
                 y_offset += 20
@@ -1252,12 +1669,23 @@ class OptimizedPhoneDetector:
         """Cerrar aplicación"""
         if self.is_monitoring:
             self.stop_monitoring()
+        self.stop_pipeline()
+        self.camera_probe.release()
+        if self.detection_graph.executor is not None:
+            self.detection_graph.executor.shutdown(wait=False)
         print("Aplicación cerrada")
         self.root.destroy()
 
 if __name__ == "__main__":
+    import argparse
     import sys
     
+    parser = argparse.ArgumentParser(description="Detector optimizado de uso de celular")
+    parser.add_argument('--procesos', choices=PROCESS_LAYOUTS, default='inline',
+                        help="inline: todo en un proceso | worker: detección en otro proceso | "
+                             "split: además, formas en un tercero")
+    args = parser.parse_args()
+    
     try:
         sys.stdout.reconfigure(encoding='utf-8')
     except:
@@ -1273,6 +1701,7 @@ if __name__ == "__main__":
     
     try:
         detector = OptimizedPhoneDetector()
+        detector.config['process_layout'] = args.procesos
         detector.run()
     except ImportError as e:
         print(f"ERROR: Falta instalar: {e}")
@@ -9,6 +9,8 @@ from datetime import datetime
 import json
 import os
 
+from detector_core import FrameGrabber
+
 class SimplePhoneDetector:
     def __init__(self):
         # OpenCV para detección facial (Haar Cascades)
@@ -16,6 +18,7 @@ class SimplePhoneDetector:
         
         # Variables de detección
         self.cap = None
+        self.grabber = None
         self.is_monitoring = False
         self.detection_start_time = None
         self.last_frame = None
@@ -383,6 +386,10 @@ Soluciones comunes:
             self.detection_start_time = None
             self.last_frame = None
             
+            # Captura en hilo propio: el bucle de detección siempre toma el frame más nuevo
+            self.grabber = FrameGrabber(self.cap)
+            self.grabber.start()
+            
             # Actualizar UI
             self.start_button.config(state='disabled')
             self.stop_button.config(state='normal')
@@ -404,7 +411,11 @@ Soluciones comunes:
         """Detener monitoreo"""
         self.is_monitoring = False
         
-        if self.cap:
+        # El hilo de captura libera la cámara cuando termina su read() en curso
+        if self.grabber:
+            self.grabber.stop()
+            self.grabber = None
+        elif self.cap:
             self.cap.release()
         
         if self.detection_start_time:
@@ -420,26 +431,21 @@ Soluciones comunes:
     
     def detection_loop(self):
         """Bucle principal de detección"""
-        consecutive_errors = 0
-        max_errors = 10
+        grabber = self.grabber
+        last_seq = 0
         
         while self.is_monitoring:
             try:
-                ret, frame = self.cap.read()
-                if not ret:
-                    consecutive_errors += 1
-                    print(f"ERROR: Error leyendo frame de cámara ({consecutive_errors}/{max_errors})")
-                    
-                    if consecutive_errors >= max_errors:
+                packet = grabber.read_latest(last_seq, timeout=1.0)
+                if packet is None:
+                    if grabber.failed:
                         print("ERROR CRITICO: Demasiados errores consecutivos - deteniendo monitoreo")
                         self.show_camera_error()
                         break
-                    
-                    time.sleep(0.1)
                     continue
                 
-                # Resetear contador de errores si leemos bien
-                consecutive_errors = 0
+                last_seq = packet.seq
+                frame = packet.frame
                 
                 # Voltear horizontalmente
                 frame = cv2.flip(frame, 1)